@@ -0,0 +1,354 @@
+"""Assignment 1 - Benchmarks
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module times the schedulers, priority queues, distance map and fleet
+statistics on random workloads of increasing size, made by module generator.
+
+Each benchmark records its wall time, the peak memory it allocated, and a
+summary of its result, so that runs can be saved as JSON and compared to find
+regressions.  The wall time is the fastest of several repetitions, since a
+single run is easily slowed down by other work on the machine.  From the
+command line:
+
+    python benchmark.py run results.json --scales 1000 10000 --repeat 5
+    python benchmark.py compare old.json new.json --threshold 0.2
+"""
+import gc
+import json
+import time
+import tracemalloc
+from random import Random, seed as seed_random
+from typing import Any, Callable, Dict, List, Tuple
+
+from container import PriorityQueue, HeapPriorityQueue, KeyPriorityQueue
+from domain import Fleet, Parcel, Truck
+from generator import iter_distances, iter_parcels, make_cities, make_trucks
+from distance_map import DistanceMap
+from scheduler import GREEDY_CONFIGS, GreedyScheduler, RandomScheduler, \
+    SeededRandomScheduler
+
+# PriorityQueue.add takes linear time, so it is only benchmarked up to this
+# many items.
+MAX_LINEAR_QUEUE_SIZE = 5000
+
+DEPOT = 'Toronto'
+
+Benchmark = Tuple[str, Callable[[], Any], Callable[[Any], Any]]
+
+
+def _workload(scale: int, seed: int) -> Tuple[List[Parcel], List[Truck]]:
+    """Return parcels and trucks for a workload of <scale> parcels, generated
+    from <seed>.  Trucks have room for roughly 90% of the parcel volume.
+    """
+    cities = make_cities(max(3, scale // 500)) + [DEPOT]
+    parcels = list(iter_parcels(scale, cities, DEPOT, seed=seed))
+    trucks = make_trucks(max(1, scale // 40), DEPOT, 300, 420, seed=seed)
+    return parcels, trucks
+
+
+def _fresh_trucks(trucks: List[Truck]) -> List[Truck]:
+    """Return empty copies of <trucks>.
+    """
+    return [Truck(t.truck_id, t.capacity, t.route[0]) for t in trucks]
+
+
+def _schedule_result(result: Tuple[List[Parcel], List[Truck]]) \
+        -> Dict[str, int]:
+    """Return a summary of a scheduling run that left the parcels and
+    trucks in <result>.
+    """
+    left, trucks = result
+    fleet = Fleet()
+    for truck in trucks:
+        fleet.add_truck(truck)
+    return {'unscheduled': len(left),
+            'unused_space': fleet.total_unused_space()}
+
+
+def benchmarks(scale: int, seed: int) -> List[Benchmark]:
+    """Return the benchmarks for a workload of <scale> parcels, generated
+    from <seed>, as (name, setup, run) triples.  run is called with the
+    value returned by setup, and only run is timed.
+    """
+    parcels, trucks = _workload(scale, seed)
+    cases = []
+
+    def random_schedule(ts: List[Truck]) -> Dict[str, int]:
+        """Schedule parcels randomly onto <ts>."""
+        seed_random(seed)
+        left = RandomScheduler().schedule(parcels, ts)
+        return _schedule_result((left, ts))
+
+    cases.append(('RandomScheduler.schedule',
+                  lambda: _fresh_trucks(trucks), random_schedule))
+    cases.append(('SeededRandomScheduler.schedule',
+                  lambda: _fresh_trucks(trucks),
+                  lambda ts: _schedule_result(
+                      (SeededRandomScheduler(seed).schedule(parcels, ts),
+                       ts))))
+
+    for config in GREEDY_CONFIGS:
+        name = 'GreedyScheduler.schedule[{parcel_priority},' \
+               '{parcel_order},{truck_order}]'.format(**config)
+        scheduler = GreedyScheduler(config)
+        cases.append((name, lambda: _fresh_trucks(trucks),
+                      lambda ts, s=scheduler: _schedule_result(
+                          (s.schedule(parcels, ts), ts))))
+
+    def fill_and_drain(queue: Any) -> int:
+        """Add every parcel to <queue>, then remove them all."""
+        for parcel in parcels:
+            queue.add(parcel)
+        total = 0
+        while not queue.is_empty():
+            total += queue.remove().volume
+        return total
+
+    if scale <= MAX_LINEAR_QUEUE_SIZE:
+        cases.append(('PriorityQueue.add/remove',
+                      lambda: PriorityQueue(_larger_volume), fill_and_drain))
+    cases.append(('HeapPriorityQueue.add/remove',
+                  lambda: HeapPriorityQueue(_larger_volume), fill_and_drain))
+    cases.append(('KeyPriorityQueue.add/remove',
+                  lambda: KeyPriorityQueue(_volume, reverse=True),
+                  fill_and_drain))
+
+    cities = make_cities(max(3, int(scale ** 0.5) // 4))
+    dmap = DistanceMap()
+    for c1, c2, d in iter_distances(cities, seed=seed):
+        dmap.add_distance(c1, c2, d)
+    rng = Random(seed)
+    pairs = [(rng.choice(cities), rng.choice(cities)) for _ in range(scale)]
+
+    def look_up(ps: List[Tuple[str, str]]) -> int:
+        """Look up the distance between every pair of cities in <ps>."""
+        total = 0
+        for c1, c2 in ps:
+            total += dmap.distance(c1, c2)
+        return total
+
+    cases.append(('DistanceMap.distance', lambda: pairs, look_up))
+
+    def fleet_statistics(fleet: Fleet) -> List[float]:
+        """Read every statistic of <fleet> after packing the parcels."""
+        stats = []
+        for i, parcel in enumerate(parcels):
+            fleet.trucks[i % len(fleet.trucks)].pack(parcel)
+            if i % 100 == 0:
+                stats = [fleet.num_nonempty_trucks(),
+                         fleet.total_unused_space(),
+                         fleet.average_fullness()]
+        return stats
+
+    def make_fleet() -> Fleet:
+        """Return a fleet of empty copies of the trucks."""
+        fleet = Fleet()
+        for truck in _fresh_trucks(trucks):
+            fleet.add_truck(truck)
+        return fleet
+
+    cases.append(('Fleet statistics', make_fleet, fleet_statistics))
+    return cases
+
+
+def _larger_volume(a: Parcel, b: Parcel) -> bool:
+    """Return True if <a> has more volume than <b>."""
+    return a.volume > b.volume
+
+
+def _volume(p: Parcel) -> int:
+    """Return the volume of <p>."""
+    return p.volume
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any],
+            memory: bool = True, repeat: int = 5) -> Dict[str, Any]:
+    """Return the wall time in seconds, the peak memory allocated in bytes,
+    and the result of calling <run> on the value returned by <setup>.
+
+    <run> is called <repeat> times, each on a new value from <setup>, and the
+    wall time is the fastest of those runs, which is the one least disturbed
+    by other work on the machine.  The garbage collector is disabled while
+    <run> is timed, as timeit does, so that a collection of the garbage left
+    by an earlier run is not counted.  The result is that of the first run.
+
+    Memory tracing slows code down, so if <memory> is True, <run> is called
+    once more, on a new value from <setup>, to measure peak memory.  If
+    <memory> is False, the peak memory is reported as -1.
+
+    Precondition: repeat >= 1
+
+    >>> m = measure(lambda: 10, lambda n: sum(range(n)), repeat=3)
+    >>> m['result'], m['repeat']
+    (45, 3)
+    >>> m['seconds'] >= 0 and m['peak_bytes'] >= 0
+    True
+    """
+    seconds = float('inf')
+    result = None
+    for i in range(repeat):
+        arg = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            value = run(arg)
+            seconds = min(seconds, time.perf_counter() - start)
+        finally:
+            gc.enable()
+        if i == 0:
+            result = value
+
+    peak = -1
+    if memory:
+        arg = setup()
+        tracemalloc.start()
+        try:
+            run(arg)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'seconds': seconds, 'peak_bytes': peak, 'result': result,
+            'repeat': repeat}
+
+
+def run_benchmarks(scales: List[int], seed: int = 0,
+                   memory: bool = True, repeat: int = 5) -> Dict[str, Any]:
+    """Run every benchmark on a workload of each size in <scales>, generated
+    from <seed>, and return the results as a JSON-compatible dictionary.
+
+    Each wall time is the fastest of <repeat> runs, as for measure.  The
+    benchmarks are run in <repeat> rounds, each running every benchmark
+    once, rather than repeating each benchmark back to back, so that a spell
+    when the machine is slow does not slow down every run of the same
+    benchmark.
+
+    >>> results = run_benchmarks([50], memory=False, repeat=2)
+    >>> names = [r['name'] for r in results['benchmarks']]
+    >>> 'RandomScheduler.schedule' in names
+    True
+    >>> len([n for n in names if n.startswith('GreedyScheduler')])
+    8
+    """
+    cases = [(scale, name, setup, run) for scale in scales
+             for name, setup, run in benchmarks(scale, seed)]
+    results = []
+    for scale, name, setup, run in cases:
+        measurement = measure(setup, run, memory, 1)
+        measurement.update(name=name, scale=scale, repeat=repeat)
+        results.append(measurement)
+    for _ in range(repeat - 1):
+        for measurement, (_, _, setup, run) in zip(results, cases):
+            seconds = measure(setup, run, False, 1)['seconds']
+            measurement['seconds'] = min(measurement['seconds'], seconds)
+    return {'seed': seed, 'scales': scales, 'benchmarks': results}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any],
+            threshold: float = 0.2, min_seconds: float = 0.001) -> List[str]:
+    """Return a description of each benchmark in <new> whose wall time or
+    peak memory is more than <threshold> times larger than in <old>, or
+    whose result differs from <old>.  Benchmarks not in both are ignored.
+
+    Wall times are only compared if the new time is at least <min_seconds>,
+    since shorter times are mostly timer noise.
+
+    >>> old = {'benchmarks': [{'name': 'a', 'scale': 10, 'seconds': 1.0,
+    ...                        'peak_bytes': 100, 'result': 3}]}
+    >>> new = {'benchmarks': [{'name': 'a', 'scale': 10, 'seconds': 1.5,
+    ...                        'peak_bytes': 100, 'result': 3}]}
+    >>> compare(old, new)
+    ['a at scale 10: seconds 1 -> 1.5 (+50%)']
+    >>> compare(old, new, 0.6)
+    []
+    >>> compare(old, new, min_seconds=2.0)
+    []
+    """
+    previous = {(b['name'], b['scale']): b for b in old['benchmarks']}
+    regressions = []
+    for bench in new['benchmarks']:
+        key = (bench['name'], bench['scale'])
+        if key not in previous:
+            continue
+        before = previous[key]
+        label = f'{bench["name"]} at scale {bench["scale"]}'
+        for measurement in ['seconds', 'peak_bytes']:
+            if measurement == 'seconds' and bench[measurement] < min_seconds:
+                continue
+            if before[measurement] > 0 and \
+                    bench[measurement] > before[measurement] * (1 + threshold):
+                change = bench[measurement] / before[measurement] - 1
+                regressions.append(
+                    f'{label}: {measurement} {before[measurement]:.4g} -> '
+                    f'{bench[measurement]:.4g} (+{change:.0%})')
+        if bench['result'] != before['result']:
+            regressions.append(f'{label}: result changed from '
+                               f'{before["result"]} to {bench["result"]}')
+    return regressions
+
+
+def main(args: List[str]) -> None:
+    """Run or compare benchmarks, as described by the command line
+    arguments <args>.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.split('=====')[-1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('output', help='JSON file to write results to')
+    run_parser.add_argument('--scales', type=int, nargs='+',
+                            default=[1000, 10000, 100000])
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--no-memory', action='store_true',
+                            help='do not measure peak memory')
+    run_parser.add_argument('--repeat', type=int, default=5,
+                            help='time the fastest of this many runs')
+    compare_parser = commands.add_parser(
+        'compare', help='report regressions between two runs')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    compare_parser.add_argument('--min-seconds', type=float, default=0.001,
+                                help='ignore wall times shorter than this')
+    options = parser.parse_args(args)
+
+    if options.command == 'run':
+        results = run_benchmarks(options.scales, options.seed,
+                                 not options.no_memory, options.repeat)
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        for bench in results['benchmarks']:
+            print(f'{bench["name"]:<68} {bench["scale"]:>9} '
+                  f'{bench["seconds"]:>10.4f}s {bench["peak_bytes"]:>12}B')
+    else:
+        with open(options.old) as file:
+            old = json.load(file)
+        with open(options.new) as file:
+            new = json.load(file)
+        regressions = compare(old, new, options.threshold,
+                              options.min_seconds)
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    import sys
+    main(sys.argv[1:])
@@ -17,10 +17,15 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 
 ===== Module Description =====
 
-This module contains the Container and PriorityQueue classes.
+This module contains the Container and PriorityQueue classes, as well as
+HeapPriorityQueue, a heap-backed PriorityQueue for large numbers of items,
+and KeyPriorityQueue, which orders items by a key function.
 """
 
-from typing import Any, List, Callable
+from heapq import heapify, heappush, heappop
+from itertools import count
+from numbers import Real
+from typing import Any, List, Callable, Iterable, Iterator, Tuple
 
 
 class Container:
@@ -158,10 +163,350 @@ class PriorityQueue(Container):
         return not self._queue
 
 
+class _HeapEntry:
+    """An item stored in a HeapPriorityQueue, together with its insertion
+    order.
+
+    === Public Attributes ===
+    item: The item that was added to the queue.
+    order: The number of items added to the queue before <item>.
+    higher_priority: The priority function of the queue holding this entry.
+    """
+    __slots__ = ('item', 'order', 'higher_priority')
+    item: Any
+    order: int
+    higher_priority: Callable[[Any, Any], bool]
+
+    def __init__(self, item: Any, order: int,
+                 higher_priority: Callable[[Any, Any], bool]) -> None:
+        """Initialize this entry for <item>, the <order>th item added to a
+        queue with priority function <higher_priority>.
+        """
+        self.item = item
+        self.order = order
+        self.higher_priority = higher_priority
+
+    def __lt__(self, other: '_HeapEntry') -> bool:
+        """Return True iff this entry should be removed before <other>.
+
+        An entry comes first if its item has higher priority, or if neither
+        item has higher priority and this entry was added earlier.
+        """
+        if self.higher_priority(self.item, other.item):
+            return True
+        if self.higher_priority(other.item, self.item):
+            return False
+        return self.order < other.order
+
+
+class HeapPriorityQueue(Container):
+    """A queue of items that operates in FIFO-priority order, backed by a
+    binary heap.
+
+    This behaves exactly like PriorityQueue: the item with the highest
+    priority is removed first, and ties are resolved in FIFO order.  Adding and
+    removing an item take O(log n) time, rather than the O(n) time taken by
+    PriorityQueue.add.
+
+    === Private Attributes ===
+    _heap:
+      A binary heap of the entries in this queue.  _heap[0] is the entry
+      of the next item to be removed.
+    _higher_priority:
+      A function that compares two items by their priority.
+      If <_higher_priority>(x, y) is true, then x has higher priority than y
+      and should be removed from the queue before y.
+    _counter:
+      Produces the insertion order of each item that is added, used to
+      break ties in FIFO order.
+
+    === Representation Invariants ===
+    - all items in <_heap> are of the same type.
+    - the items in <_heap> are appropriate arguments for the
+      function <_higher_priority>.
+    - <_heap> satisfies the heap property.
+    """
+    _heap: List[_HeapEntry]
+    _higher_priority: Callable[[Any, Any], bool]
+    _counter: Iterator[int]
+
+    def __init__(self, higher_priority: Callable[[Any, Any], bool]) -> None:
+        """Initialize this to an empty HeapPriorityQueue. For any two elements
+        x and y of the queue, if <higher_priority>(x, y) is true, then x has
+        higher priority than y.
+
+        >>> pq = HeapPriorityQueue(str.__lt__)
+        >>> pq.is_empty()
+        True
+        """
+        self._heap = []
+        self._higher_priority = higher_priority
+        self._counter = count()
+
+    @classmethod
+    def from_items(cls, higher_priority: Callable[[Any, Any], bool],
+                   items: Iterable[Any]) -> 'HeapPriorityQueue':
+        """Return a new HeapPriorityQueue containing <items>, as if each of
+        them had been added in order.  This takes O(n) time for n items.
+
+        >>> pq = HeapPriorityQueue.from_items(_shorter,
+        ...                                   ['fred', 'arju', 'monalisa'])
+        >>> pq.add('hat')
+        >>> [pq.remove() for _ in range(4)]
+        ['hat', 'fred', 'arju', 'monalisa']
+        """
+        pq = cls(higher_priority)
+        pq._heap = [_HeapEntry(item, order, higher_priority)
+                    for order, item in zip(pq._counter, items)]
+        heapify(pq._heap)
+        return pq
+
+    def add(self, item: Any) -> None:
+        """Add <item> to this HeapPriorityQueue.
+
+        >>> pq = HeapPriorityQueue(_shorter)
+        >>> pq.add('fred')
+        >>> pq.add('arju')
+        >>> pq.add('monalisa')
+        >>> pq.add('hat')
+        >>> pq.remove()
+        'hat'
+        """
+        heappush(self._heap,
+                 _HeapEntry(item, next(self._counter), self._higher_priority))
+
+    def remove(self) -> Any:
+        """Remove and return the next item from this HeapPriorityQueue.
+
+        Precondition: this priority queue is non-empty.
+
+        >>> # When we hit the tie, the one that was added first will be
+        >>> # removed first.
+        >>> pq = HeapPriorityQueue(_shorter)
+        >>> pq.add('fred')
+        >>> pq.add('arju')
+        >>> pq.add('monalisa')
+        >>> pq.add('hat')
+        >>> pq.remove()
+        'hat'
+        >>> pq.remove()
+        'fred'
+        >>> pq.remove()
+        'arju'
+        >>> pq.remove()
+        'monalisa'
+        """
+        return heappop(self._heap).item
+
+    def is_empty(self) -> bool:
+        """Return True iff this HeapPriorityQueue is empty.
+
+        >>> pq = HeapPriorityQueue(str.__lt__)
+        >>> pq.is_empty()
+        True
+        >>> pq.add('fred')
+        >>> pq.is_empty()
+        False
+        """
+        return not self._heap
+
+
+def _is_real(key: Any) -> bool:
+    """Return whether <key> is a real number, which a reversed
+    KeyPriorityQueue can negate.
+
+    >>> from fractions import Fraction
+    >>> _is_real(3), _is_real(Fraction(1, 2)), _is_real('3')
+    (True, True, False)
+    """
+    return type(key) is int or type(key) is float or isinstance(key, Real)
+
+
+class _ReversedEntry(tuple):
+    """A (key, insertion order, item) entry of a reversed KeyPriorityQueue
+    whose keys cannot all be negated.  Entries with larger keys come first,
+    and entries with equal keys come in insertion order.
+
+    Each comparison of two entries is one call to __lt__, which compares the
+    keys directly, rather than the __eq__ and __lt__ calls that comparing
+    tuples of wrapped keys would make.
+    """
+    __slots__ = ()
+
+    def __lt__(self, other: '_ReversedEntry') -> bool:
+        """Return True iff this entry comes before <other>.
+        """
+        key = self[0]
+        other_key = other[0]
+        if key == other_key:
+            return self[1] < other[1]
+        return other_key < key
+
+
+class KeyPriorityQueue(Container):
+    """A queue of items that operates in FIFO-priority order, where priority
+    is given by a key function.
+
+    Items with smaller keys have higher priority, unless the queue is
+    reversed, in which case items with larger keys have higher priority.
+    Ties are resolved in FIFO order.  The key of each item is computed once,
+    when it is added, and keys are compared directly rather than through a
+    Python callback.
+
+    A reversed queue negates its keys while every key is a real number, so
+    it is as fast as one that is not reversed.  Once a key that is not a
+    real number is added, such as a string, every entry is kept in a
+    _ReversedEntry instead, which costs one Python call per comparison; on a
+    large queue this makes adding and removing items about twice as slow.
+
+    === Private Attributes ===
+    _heap:
+      A binary heap of (key, insertion order, item) entries.  _heap[0] holds
+      the next item to be removed.
+    _key:
+      The function that computes the key of an item.
+    _reverse:
+      Whether items with larger keys have higher priority.
+    _negated:
+      Whether the keys in <_heap> are negated, which they are in a reversed
+      queue until a key that is not a real number is added.
+    _counter:
+      Produces the insertion order of each item that is added, used to
+      break ties in FIFO order.
+
+    === Representation Invariants ===
+    - the keys in <_heap> are mutually comparable.
+    - if <_negated> is True, <_reverse> is True and every key in <_heap> is
+      a negated real number.
+    - if <_reverse> is True and <_negated> is False, every entry in <_heap>
+      is a _ReversedEntry.
+    - <_heap> satisfies the heap property.
+    """
+    _heap: List[Tuple[Any, int, Any]]
+    _key: Callable[[Any], Any]
+    _reverse: bool
+    _negated: bool
+    _counter: Iterator[int]
+
+    def __init__(self, key: Callable[[Any], Any],
+                 reverse: bool = False) -> None:
+        """Initialize this to an empty KeyPriorityQueue that orders items by
+        <key>, from smallest to largest, or from largest to smallest if
+        <reverse> is True.
+
+        >>> pq = KeyPriorityQueue(len)
+        >>> pq.is_empty()
+        True
+        """
+        self._heap = []
+        self._key = key
+        self._reverse = reverse
+        self._negated = reverse
+        self._counter = count()
+
+    @classmethod
+    def from_items(cls, key: Callable[[Any], Any], items: Iterable[Any],
+                   reverse: bool = False) -> 'KeyPriorityQueue':
+        """Return a new KeyPriorityQueue containing <items>, as if each of
+        them had been added in order.  This takes O(n) time for n items.
+
+        >>> pq = KeyPriorityQueue.from_items(len, ['fred', 'hat', 'monalisa',
+        ...                                        'arju'], reverse=True)
+        >>> [pq.remove() for _ in range(4)]
+        ['monalisa', 'fred', 'arju', 'hat']
+        """
+        pq = cls(key, reverse)
+        heap = [(key(item), order, item)
+                for order, item in zip(pq._counter, items)]
+        if not reverse:
+            pq._heap = heap
+        elif all(_is_real(entry[0]) for entry in heap):
+            pq._heap = [(-k, order, item) for k, order, item in heap]
+        else:
+            pq._negated = False
+            pq._heap = [_ReversedEntry(entry) for entry in heap]
+        heapify(pq._heap)
+        return pq
+
+    def add(self, item: Any) -> None:
+        """Add <item> to this KeyPriorityQueue.
+
+        >>> pq = KeyPriorityQueue(len)
+        >>> pq.add('fred')
+        >>> pq.add('arju')
+        >>> pq.add('monalisa')
+        >>> pq.add('hat')
+        >>> pq.remove()
+        'hat'
+
+        Keys of different numeric types are ordered correctly when reversed:
+
+        >>> from fractions import Fraction
+        >>> pq = KeyPriorityQueue(lambda x: x, reverse=True)
+        >>> for x in [1, 2, Fraction(5, 2), 3.5, True, Fraction(1, 2)]:
+        ...     pq.add(x)
+        >>> [str(pq.remove()) for _ in range(6)]
+        ['3.5', '5/2', '2', '1', 'True', '1/2']
+        """
+        key = self._key(item)
+        if not self._reverse:
+            heappush(self._heap, (key, next(self._counter), item))
+        elif self._negated and _is_real(key):
+            heappush(self._heap, (-key, next(self._counter), item))
+        else:
+            if self._negated:
+                self._stop_negating()
+            heappush(self._heap,
+                     _ReversedEntry((key, next(self._counter), item)))
+
+    def _stop_negating(self) -> None:
+        """Replace every entry of this reversed queue, whose keys are
+        negated, by a _ReversedEntry with the original key.
+        """
+        self._heap = [_ReversedEntry((-k, order, item))
+                      for k, order, item in self._heap]
+        heapify(self._heap)
+        self._negated = False
+
+    def remove(self) -> Any:
+        """Remove and return the next item from this KeyPriorityQueue.
+
+        Precondition: this priority queue is non-empty.
+
+        >>> pq = KeyPriorityQueue(len)
+        >>> pq.add('fred')
+        >>> pq.add('arju')
+        >>> pq.add('monalisa')
+        >>> pq.add('hat')
+        >>> pq.remove()
+        'hat'
+        >>> pq.remove()
+        'fred'
+        >>> pq.remove()
+        'arju'
+        >>> pq.remove()
+        'monalisa'
+        """
+        return heappop(self._heap)[2]
+
+    def is_empty(self) -> bool:
+        """Return True iff this KeyPriorityQueue is empty.
+
+        >>> pq = KeyPriorityQueue(len)
+        >>> pq.is_empty()
+        True
+        >>> pq.add('fred')
+        >>> pq.is_empty()
+        False
+        """
+        return not self._heap
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'heapq',
+                                   'itertools', 'numbers'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
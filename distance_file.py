@@ -0,0 +1,189 @@
+"""Assignment 1 - Distance map files
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module saves distance maps in a binary file format, and contains the
+class MappedDistanceMap, which looks up distances in such a file without
+reading it in.
+
+A binary distance map file holds, in order:
+    - a 16 byte header: the bytes b'DMAP', then the format version, the
+      number of cities n and the length in bytes of the city table, each a
+      little-endian unsigned 32-bit integer;
+    - the city table: the UTF-8 name of each city followed by a newline, in
+      order of city id, padded with zero bytes to a multiple of 4 bytes;
+    - the distance matrix: n * n little-endian signed 32-bit integers, row by
+      row, where the distance from city i to city j is at position i * n + j,
+      and is -1 if it is not stored.
+
+The file is mapped into memory with mmap, so opening it only reads the city
+table, and worker processes that open the same file share its pages.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Tuple
+
+from distance_map import DistanceMap
+
+MAGIC = b'DMAP'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sIII')
+
+
+def save_distance_map(dmap: DistanceMap, filename: str) -> None:
+    """Save <dmap> to the binary distance map file <filename>.
+
+    >>> import os, tempfile
+    >>> dmap = DistanceMap()
+    >>> dmap.add_distance('Toronto', 'London', 4, 5)
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'map.bin')
+    >>> save_distance_map(dmap, filename)
+    >>> mapped = MappedDistanceMap(filename)
+    >>> mapped.distance('London', 'Toronto'), mapped.distance('Toronto', 'X')
+    (5, -1)
+    >>> mapped.close()
+    """
+    n = dmap.num_cities()
+    names = b''.join(dmap.city_name(i).encode('utf-8') + b'\n'
+                     for i in range(n))
+    names += b'\0' * (-len(names) % 4)
+    with open(filename, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, n, len(names)))
+        file.write(names)
+        for i in range(n):
+            row = dmap.row(i)
+            if sys.byteorder != 'little':
+                row.byteswap()
+            row.tofile(file)
+
+
+class MappedDistanceMap(DistanceMap):
+    """A read-only distance map whose distances are looked up directly in a
+    binary distance map file, mapped into memory.
+
+    Distances cannot be added to a MappedDistanceMap.  A MappedDistanceMap
+    can be sent to another process, which maps the same file again rather
+    than copying its distances.
+
+    === Private Attributes ===
+    _filename: The name of the file this distance map is read from.
+    _mmap: The memory map of the file, or None if the distances were copied
+    into an array because this machine is not little-endian.
+
+    === Representation Invariants ===
+    - _stride == len(_cities)
+    """
+    _filename: str
+    _mmap: Any
+
+    def __init__(self, filename: str) -> None:
+        """Initialize this distance map from the binary distance map file
+        <filename>.
+
+        Raise ValueError if <filename> is not a binary distance map file.
+        """
+        super().__init__()
+        self._filename = filename
+        with open(filename, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        n, names_length = self._read_header()
+        start = _HEADER.size
+        names = self._mmap[start:start + names_length].rstrip(b'\0')
+        self._cities = names.decode('utf-8').split('\n')[:n]
+        self._city_ids = {city: i for i, city in enumerate(self._cities)}
+        self._stride = n
+
+        start += names_length
+        if len(self._mmap) != start + 4 * n * n:
+            self.close()
+            raise ValueError(f'{filename} is not a distance map file')
+        matrix = memoryview(self._mmap)[start:]
+        if sys.byteorder == 'little':
+            self._matrix = matrix.cast('i')
+        else:
+            self._matrix = array('i', matrix.tobytes())
+            self._matrix.byteswap()
+            matrix.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def _read_header(self) -> Tuple[int, int]:
+        """Return the number of cities and the length of the city table in
+        the header of this distance map's file.
+
+        Raise ValueError if the header is not valid.
+        """
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError(f'{self._filename} is not a distance map file')
+        magic, version, n, names_length = \
+            _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f'{self._filename} is not a distance map file')
+        return n, names_length
+
+    def __reduce__(self) -> Tuple[type, Tuple[str]]:
+        """Return how to rebuild this distance map in another process: by
+        mapping its file again.
+        """
+        return MappedDistanceMap, (self._filename,)
+
+    def __enter__(self) -> 'MappedDistanceMap':
+        """Return this distance map.
+        """
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close this distance map.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """Unmap this distance map's file.  This distance map must not be
+        used afterwards.
+        """
+        if isinstance(self._matrix, memoryview):
+            self._matrix.release()
+        self._matrix = array('i')
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def add_distance(self, c1: str, c2: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """Raise ValueError, since distances cannot be added to a distance
+        map read from a file.
+        """
+        raise ValueError('a MappedDistanceMap is read-only')
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['save_distance_map', 'MappedDistanceMap.__init__'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'mmap',
+                                   'struct', 'sys', 'array', 'distance_map'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
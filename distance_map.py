@@ -23,16 +23,29 @@ from the map file. (All reading from files is done in module experiment.)
 Instead, it provides public methods that can be called to store and look up
 distances.
 """
-from typing import Dict, Tuple
+from array import array
+from typing import Dict, List, Sequence
 
 
 class DistanceMap:
     """
     A distance map for storing distances between locations.
 
+    Each city is given an integer id, in the order in which cities are first
+    added, and distances are stored in a square matrix indexed by city ids.
+
     === Private Attributes ===
-    _distances: A dictionary that stores the distances between locations
-    for this distance map.
+    _cities: The names of the cities in this distance map, indexed by id.
+    _city_ids: Maps the name of each city in this distance map to its id.
+    _matrix: The distances between cities, stored row by row.  The distance
+    from the city with id i to the city with id j is stored at
+    _matrix[i * _stride + j], and is -1 if it has not been added.
+    _stride: The length of each row of <_matrix>.
+    _version: The number of times a distance has been added to this map.
+
+    === Representation Invariants ===
+    - len(_cities) <= _stride
+    - len(_matrix) == _stride * _stride
 
     === Sample Usage ===
     >>> dmap = DistanceMap()
@@ -42,13 +55,44 @@ class DistanceMap:
     >>> dmap.distance('Vancouver', 'Toronto')
     50
     """
-    _distances: Dict[Tuple, int]
+    _cities: List[str]
+    _city_ids: Dict[str, int]
+    _matrix: array
+    _stride: int
+    _version: int
 
     def __init__(self) -> None:
         """Initialize this Distance Map.
         A distance map has no stored distances when it is first created.
         """
-        self._distances = {}
+        self._cities = []
+        self._city_ids = {}
+        self._matrix = array('i')
+        self._stride = 0
+        self._version = 0
+
+    def _add_city(self, city: str) -> int:
+        """Return the id of <city>, giving it a new id if it is not yet in
+        this distance map.
+        """
+        if city in self._city_ids:
+            return self._city_ids[city]
+
+        n = len(self._cities)
+        if n == self._stride:
+            # Grow the matrix geometrically, so that adding n cities copies
+            # O(n^2) distances in total.
+            new_stride = max(8, n + n // 2)
+            matrix = array('i', [-1]) * (new_stride * new_stride)
+            for i in range(n):
+                matrix[i * new_stride:i * new_stride + n] = \
+                    self._matrix[i * self._stride:i * self._stride + n]
+            self._matrix = matrix
+            self._stride = new_stride
+
+        self._cities.append(city)
+        self._city_ids[city] = n
+        return n
 
     def add_distance(self, c1: str, c2: str, distance1: int,
                      distance2: int = -1) -> None:
@@ -71,12 +115,15 @@ class DistanceMap:
         >>> dmap.distance('Hamilton', 'Toronto')
         4
         """
+        i = self._add_city(c1)
+        j = self._add_city(c2)
+        self._version += 1
 
-        self._distances[(c1, c2)] = distance1
+        self._matrix[i * self._stride + j] = distance1
         if distance2 != -1:
-            self._distances[(c2, c1)] = distance2
+            self._matrix[j * self._stride + i] = distance2
         else:
-            self._distances[(c2, c1)] = distance1
+            self._matrix[j * self._stride + i] = distance1
 
     def distance(self, c1: str, c2: str) -> int:
         """Return the distance from <c1> to <c2>.
@@ -88,15 +135,162 @@ class DistanceMap:
         >>> dmap.distance('Toronto', 'Hamilton')
         -1
         """
-        if (c1, c2) in self._distances:
-            return self._distances[(c1, c2)]
-        return -1
+        i = self._city_ids.get(c1)
+        j = self._city_ids.get(c2)
+        if i is None or j is None:
+            return -1
+        return self._matrix[i * self._stride + j]
+
+    def version(self) -> int:
+        """Return the number of times a distance has been added to this map.
+        Distances computed from this map are out of date if its version has
+        changed since they were computed.
+
+        >>> dmap = DistanceMap()
+        >>> dmap.version()
+        0
+        >>> dmap.add_distance('Toronto', 'London', 4)
+        >>> dmap.version()
+        1
+        """
+        return self._version
+
+    def num_cities(self) -> int:
+        """Return the number of cities in this distance map.
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4)
+        >>> dmap.num_cities()
+        2
+        """
+        return len(self._cities)
+
+    def city_id(self, city: str) -> int:
+        """Return the id of <city>, or -1 if <city> is not in this distance
+        map.
+
+        Ids are assigned in the order in which cities are first added,
+        starting from 0.
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4)
+        >>> dmap.city_id('London')
+        1
+        >>> dmap.city_id('Hamilton')
+        -1
+        """
+        return self._city_ids.get(city, -1)
+
+    def city_name(self, city_id: int) -> str:
+        """Return the name of the city with id <city_id>.
+
+        Precondition: 0 <= city_id < self.num_cities()
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4)
+        >>> dmap.city_name(0)
+        'Toronto'
+        """
+        return self._cities[city_id]
+
+    def distance_by_id(self, id1: int, id2: int) -> int:
+        """Return the distance from the city with id <id1> to the city with
+        id <id2>, or -1 if that distance is not stored in the distance map.
+
+        Precondition: both ids are between 0 and self.num_cities() - 1.
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4, 5)
+        >>> dmap.distance_by_id(1, 0)
+        5
+        >>> dmap.distance_by_id(1, 1)
+        -1
+        """
+        return self._matrix[id1 * self._stride + id2]
+
+    def row(self, city_id: int) -> array:
+        """Return an array of the distances from the city with id <city_id>
+        to each city in this distance map, indexed by city id.
+
+        Precondition: 0 <= city_id < self.num_cities()
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4, 5)
+        >>> dmap.row(1).tolist()
+        [5, -1]
+        """
+        start = city_id * self._stride
+        return array('i', self._matrix[start:start + len(self._cities)])
+
+    def distances(self, origins: Sequence[str],
+                  destinations: Sequence[str]) -> List[int]:
+        """Return a list of the distances from each city in <origins> to the
+        city at the same position in <destinations>.  Distances that are not
+        stored in the distance map are -1, as for DistanceMap.distance.
+
+        Precondition: len(origins) == len(destinations)
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4, 5)
+        >>> dmap.distances(['Toronto', 'London', 'Toronto'],
+        ...                ['London', 'Toronto', 'Hamilton'])
+        [4, 5, -1]
+        """
+        ids = self._city_ids
+        return self._lookup([ids.get(c, -1) for c in origins],
+                            [ids.get(c, -1) for c in destinations])
+
+    def route_distances(self, route: Sequence[str]) -> List[int]:
+        """Return a list of the distances of each leg of <route>, including
+        the leg from the last city of <route> back to the first.  A route
+        with fewer than two cities has no legs.
+
+        Distances that are not stored in the distance map are -1, as for
+        DistanceMap.distance.
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4, 5)
+        >>> dmap.add_distance('London', 'Hamilton', 3)
+        >>> dmap.route_distances(['Toronto', 'London', 'Hamilton'])
+        [4, 3, -1]
+        >>> dmap.route_distances(['Toronto'])
+        []
+        """
+        if len(route) < 2:
+            return []
+        ids = [self._city_ids.get(c, -1) for c in route]
+        return self._lookup(ids, ids[1:] + ids[:1])
+
+    def route_distance(self, route: Sequence[str]) -> int:
+        """Return the total distance of <route>, including the leg from the
+        last city of <route> back to the first.  This is the sum of
+        self.route_distances(<route>).
+
+        >>> dmap = DistanceMap()
+        >>> dmap.add_distance('Toronto', 'London', 4, 5)
+        >>> dmap.route_distance(['Toronto', 'London'])
+        9
+        """
+        return sum(self.route_distances(route))
+
+    def _lookup(self, ids1: List[int], ids2: List[int]) -> List[int]:
+        """Return a list of the distances from each city id in <ids1> to the
+        city id at the same position in <ids2>, where an id of -1 stands for
+        a city that is not in this distance map.
+        """
+        matrix = self._matrix
+        stride = self._stride
+        if -1 in ids1 or -1 in ids2:
+            return [matrix[i * stride + j] if i != -1 and j != -1 else -1
+                    for i, j in zip(ids1, ids2)]
+        return [matrix[i * stride + j] for i, j in zip(ids1, ids2)]
 
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
-        'allowed-import-modules': ['doctest', 'python_ta', 'typing'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'array'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
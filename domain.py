@@ -18,11 +18,21 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 ===== Module Description =====
 
 This module contains the classes required to represent the entities
-in the simulation: Parcel, Truck and Fleet.
+in the simulation: Parcel, Truck and Fleet, as well as ParcelTable, which
+stores many parcels compactly.
 """
-from typing import List, Dict
+from array import array
+from copy import deepcopy
+from math import fsum
+from typing import Any, List, Dict, Optional, Iterable, Iterator, Tuple, \
+    Union
 from distance_map import DistanceMap
 
+# The attributes of a Truck that are not pickled: the fleets it is in, and
+# its cached route distance.
+_UNPICKLED_TRUCK_SLOTS = ('_fleets', '_route_dmap', '_route_version',
+                          '_route_length')
+
 
 class Parcel:
     """ A parcel to be delivered.
@@ -32,9 +42,12 @@ class Parcel:
     volume: Volume of this parcel.
     start: Source location of the parcel.
     end: The parcel's destination location.
+    dimensions: The size of this parcel in each extra capacity dimension,
+    such as weight or pallet slots, in the order used by Truck.limits.
 
     === Representation invariants ===
     - Volume is a positive integer.
+    - Each of dimensions is a non-negative integer.
 
     === Sample Usage ===
     >>> p1 = Parcel(1, 5, 'Buffalo', 'Hamilton')
@@ -47,13 +60,15 @@ class Parcel:
     >>> p1.end
     'Hamilton'
     """
+    __slots__ = ('parcel_id', 'volume', 'start', 'end', 'dimensions')
     parcel_id: int
     volume: int
     start: str
     end: str
+    dimensions: Tuple[int, ...]
 
-    def __init__(self, parcel_id: int, volume: int, start: str, end: str) \
-            -> None:
+    def __init__(self, parcel_id: int, volume: int, start: str, end: str,
+                 dimensions: Tuple[int, ...] = ()) -> None:
         """Initialize this parcel.
 
         Precondition: volume is a positive integer.
@@ -62,6 +77,225 @@ class Parcel:
         self.volume = volume
         self.start = start
         self.end = end
+        self.dimensions = dimensions
+
+
+class ParcelTable:
+    """ A table of parcels, stored column by column.
+
+    Each parcel is a row of the table, numbered from 0 in the order in which
+    parcels were added.  Row values are stored in typed arrays, and city
+    names are stored once each and referred to by integer ids, so that a
+    table of many parcels takes far less memory than the same number of
+    Parcel objects.
+
+    === Public Attributes ===
+    parcel_ids: The ID of the parcel in each row.
+    volumes: The volume of the parcel in each row.
+    starts: The city id of the source location of the parcel in each row.
+    ends: The city id of the destination of the parcel in each row.
+    cities: The name of each city in this table, indexed by city id.
+    dimensions: The dimensions of the parcel in each row that has any, by
+    row number.  Most parcels have none, so they are not stored in arrays.
+
+    === Private Attributes ===
+    _city_ids: Maps the name of each city in this table to its id.
+
+    === Representation invariants ===
+    - parcel_ids, volumes, starts and ends all have the same length.
+    - every city id in starts and ends is a valid index into cities.
+
+    === Sample Usage ===
+    >>> table = ParcelTable()
+    >>> table.add(1, 5, 'Buffalo', 'Hamilton')
+    >>> table.add(2, 8, 'Toronto', 'Buffalo')
+    >>> len(table)
+    2
+    >>> table.cities[table.ends[1]]
+    'Buffalo'
+    >>> table.parcel(0).end
+    'Hamilton'
+    """
+    __slots__ = ('parcel_ids', 'volumes', 'starts', 'ends', 'cities',
+                 'dimensions', '_city_ids')
+    parcel_ids: array
+    volumes: array
+    starts: array
+    ends: array
+    cities: List[str]
+    dimensions: Dict[int, Tuple[int, ...]]
+    _city_ids: Dict[str, int]
+
+    def __init__(self) -> None:
+        """Initialize this table with no parcels.
+        """
+        self.parcel_ids = array('q')
+        self.volumes = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.cities = []
+        self.dimensions = {}
+        self._city_ids = {}
+
+    @classmethod
+    def from_parcels(cls, parcels: Iterable[Parcel]) -> 'ParcelTable':
+        """Return a new table containing <parcels>, in order.
+
+        >>> table = ParcelTable.from_parcels([Parcel(1, 5, 'A', 'B'),
+        ...                                   Parcel(2, 3, 'A', 'C', (9,))])
+        >>> table.parcel(0).volume, table.parcel(1).dimensions
+        (5, (9,))
+        """
+        table = cls()
+        for p in parcels:
+            table.add(p.parcel_id, p.volume, p.start, p.end, p.dimensions)
+        return table
+
+    def __len__(self) -> int:
+        """Return the number of parcels in this table.
+        """
+        return len(self.parcel_ids)
+
+    def city_id(self, city: str) -> int:
+        """Return the id of <city> in this table, giving it a new id if it
+        is not yet in this table.
+
+        >>> table = ParcelTable()
+        >>> table.city_id('Toronto'), table.city_id('Guelph')
+        (0, 1)
+        >>> table.city_id('Toronto')
+        0
+        """
+        if city not in self._city_ids:
+            self._city_ids[city] = len(self.cities)
+            self.cities.append(city)
+        return self._city_ids[city]
+
+    def add(self, parcel_id: int, volume: int, start: str, end: str,
+            dimensions: Tuple[int, ...] = ()) -> None:
+        """Add a parcel with the given <parcel_id>, <volume>, <start>, <end>
+        and <dimensions> as the last row of this table.
+
+        Precondition: volume is a positive integer.
+        """
+        if dimensions:
+            self.dimensions[len(self.parcel_ids)] = tuple(dimensions)
+        self.parcel_ids.append(parcel_id)
+        self.volumes.append(volume)
+        self.starts.append(self.city_id(start))
+        self.ends.append(self.city_id(end))
+
+    def parcel(self, row: int) -> Parcel:
+        """Return a new Parcel with the values in row <row> of this table.
+
+        Precondition: 0 <= row < len(self)
+        """
+        return Parcel(self.parcel_ids[row], self.volumes[row],
+                      self.cities[self.starts[row]],
+                      self.cities[self.ends[row]],
+                      self.dimensions.get(row, ()))
+
+
+class Route:
+    """ A route that visits each of its cities once.
+
+    A Route can be used in place of a list of cities: it can be indexed,
+    sliced, iterated over and compared to a list.  Appending a city that is
+    already on the route leaves the route unchanged, and checking whether a
+    city is on the route takes constant time.
+
+    === Private Attributes ===
+    _stops: The cities on this route, in the order they are visited.
+    _index: The position in <_stops> of each city on this route.
+
+    === Representation invariants ===
+    - No city appears more than once in _stops.
+    - _index[_stops[i]] == i for each position i of _stops.
+
+    === Sample Usage ===
+    >>> r = Route(['Toronto', 'Hamilton'])
+    >>> r.append('London')
+    >>> r.append('Hamilton')
+    >>> r
+    ['Toronto', 'Hamilton', 'London']
+    >>> 'London' in r, r.index('London'), r[-1]
+    (True, 2, 'London')
+    """
+    __slots__ = ('_stops', '_index')
+    _stops: List[str]
+    _index: Dict[str, int]
+
+    def __init__(self, cities: Iterable[str] = ()) -> None:
+        """Initialize this route to visit each city in <cities>, in order,
+        skipping any city already visited.
+        """
+        self._stops = []
+        self._index = {}
+        for city in cities:
+            self.append(city)
+
+    def append(self, city: str) -> None:
+        """Add <city> to the end of this route, unless it is already on this
+        route.
+        """
+        if city not in self._index:
+            self._index[city] = len(self._stops)
+            self._stops.append(city)
+
+    def index(self, city: str) -> int:
+        """Return the position of <city> on this route.
+
+        Precondition: <city> is on this route.
+        """
+        return self._index[city]
+
+    def __contains__(self, city: object) -> bool:
+        """Return whether <city> is on this route.
+        """
+        return city in self._index
+
+    def __len__(self) -> int:
+        """Return the number of cities on this route.
+        """
+        return len(self._stops)
+
+    def __iter__(self) -> Iterator[str]:
+        """Return an iterator over the cities on this route, in order.
+        """
+        return iter(self._stops)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        """Return the city at position <i> of this route, or a list of the
+        cities in slice <i>.
+        """
+        return self._stops[i]
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        """Remove the city at position <i>, or the cities in slice <i>, from
+        this route.
+
+        >>> r = Route(['Toronto', 'Hamilton', 'London', 'Guelph'])
+        >>> del r[2:]
+        >>> r.append('Guelph')
+        >>> r
+        ['Toronto', 'Hamilton', 'Guelph']
+        """
+        del self._stops[i]
+        self._index = {city: j for j, city in enumerate(self._stops)}
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether <other> is a Route or list with the same cities in
+        the same order as this route.
+        """
+        if isinstance(other, Route):
+            return self._stops == other._stops
+        return isinstance(other, list) and self._stops == other
+
+    def __repr__(self) -> str:
+        """Return a string representation of this route, which is the same as
+        that of a list of its cities.
+        """
+        return repr(self._stops)
 
 
 class Truck:
@@ -70,36 +304,77 @@ class Truck:
     === Public Attributes ===
     truck_id: The specific identification number of this truck.
     capacity: The maximum capacity of this truck.
-    route: The truck's route.
+    route: The truck's route.  This is a Route, which visits each city once,
+    if the truck was created with unique_stops, and a list otherwise.
     available_space: Available space in the truck.
+    limits: The capacity of this truck in each extra capacity dimension,
+    such as weight or pallet slots.  A truck has no limit in the dimensions
+    after the last of its limits.
+    available_limits: The capacity left in each of <limits>.
     parcels: A list of all the parcels in this truck.
-    packed_p: A list of the IDs of the parcels in this truck.
+    packed_p: A list of the IDs of the parcels in this truck, computed from
+    <parcels>.
+
+    === Private Attributes ===
+    _fleets: The fleets this truck has been added to, which are notified
+    whenever a parcel is packed into this truck.
+    _route_dmap: The distance map that the cached length of this truck's
+    route was computed with, or None if no length is cached.
+    _route_version: The version of <_route_dmap> when the cached length was
+    computed.
+    _route_length: The cached total distance of this truck's route from the
+    depot to its last stop, not including the return to the depot.
 
     === Representation invariants ===
     - capacity is a positive integer.
     - available_space is between 0 and capacity, inclusive.
+    - len(available_limits) == len(limits), and each of available_limits is
+      between 0 and the corresponding limit, inclusive.
     """
+    __slots__ = ('truck_id', 'capacity', 'route', 'available_space',
+                 'limits', 'available_limits', 'parcels', '_fleets',
+                 '_route_dmap', '_route_version', '_route_length')
     truck_id: int
     capacity: int
-    route: List[str]
+    route: Union[List[str], Route]
     available_space: int
+    limits: Tuple[int, ...]
+    available_limits: List[int]
     parcels: List[Parcel]
-    packed_p: List[int]
+    _fleets: List['Fleet']
+    _route_dmap: Optional[DistanceMap]
+    _route_version: int
+    _route_length: int
 
-    def __init__(self, truck_id: int, capacity: int, depot: str) -> None:
+    def __init__(self, truck_id: int, capacity: int, depot: str,
+                 unique_stops: bool = False,
+                 limits: Tuple[int, ...] = ()) -> None:
         """Initialize this truck.
 
         A truck is empty when it is created; its available space is equal to
         its capacity. It has no parcels inside it initially.
         The route of the truck is only <depot> before any parcels are packed
         into it.
+
+        If <unique_stops> is True, the truck's route is a Route, so the truck
+        visits each city once no matter the order its parcels are packed in.
+        Otherwise it is a list, which only skips a destination that is
+        already the last stop.
+
+        <limits> are the truck's capacities in extra dimensions, such as
+        weight, beyond its volume.
         """
         self.truck_id = truck_id
         self.capacity = capacity
-        self.route = [depot]
+        self.route = Route([depot]) if unique_stops else [depot]
         self.available_space = capacity
-        self.packed_p = []
+        self.limits = limits
+        self.available_limits = list(limits)
         self.parcels = []
+        self._fleets = []
+        self._route_dmap = None
+        self._route_version = 0
+        self._route_length = 0
 
     def pack(self, p: Parcel) -> bool:
         """Packs parcel <p> into the truck if there is enough available space.
@@ -109,7 +384,9 @@ class Truck:
 
         Assume the parcel has been already shipped to the depot of the truck.
         Add the destination of the parcel to the truck's route.
-        Subtract the parcel's volume from the truck's available space.
+        Subtract the parcel's volume from the truck's available space, and
+        its size in each extra dimension from the truck's available limits.
+        A parcel only fits if it fits in every dimension.
 
         >>> t1 = Truck(1423, 10, 'Toronto')
         >>> p1 = Parcel(1, 5, 'Buffalo', 'Hamilton')
@@ -117,16 +394,246 @@ class Truck:
         True
         >>> t1.route
         ['Toronto', 'Hamilton']
+        >>> t2 = Truck(1424, 10, 'Toronto', unique_stops=True)
+        >>> for i, city in enumerate(['Hamilton', 'London', 'Hamilton']):
+        ...     _ = t2.pack(Parcel(i, 1, 'Toronto', city))
+        >>> t2.route
+        ['Toronto', 'Hamilton', 'London']
+        >>> t3 = Truck(1425, 10, 'Toronto', limits=(100,))
+        >>> t3.pack(Parcel(1, 5, 'Toronto', 'Guelph', (120,)))
+        False
+        >>> t3.pack(Parcel(2, 5, 'Toronto', 'Guelph', (80,)))
+        True
+        >>> t3.available_limits
+        [20]
         """
-        if p.volume <= self.available_space:
+        if p.volume <= self.available_space and \
+                (not p.dimensions or self._fits_limits(p)):
+            old_space = self.available_space
+            old_stops = len(self.route)
             self.available_space -= p.volume
-            self.packed_p.append(p.parcel_id)
+            if p.dimensions:
+                for k, size in enumerate(p.dimensions[:len(self.limits)]):
+                    self.available_limits[k] -= size
             self.parcels.append(p)
-            if p.end != self.route[-1]:
+            if isinstance(self.route, Route):
+                new_stop = p.end not in self.route
+            else:
+                new_stop = p.end != self.route[-1]
+            if new_stop:
+                if self._route_dmap is not None:
+                    self._route_length += \
+                        self._route_dmap.distance(self.route[-1], p.end)
                 self.route.append(p.end)
+            for fleet in self._fleets:
+                fleet.truck_packed(self, old_space, old_stops)
             return True
         return False
 
+    def unpack(self, stops: int) -> Parcel:
+        """Remove and return the parcel most recently packed into this truck,
+        and shorten the truck's route to its first <stops> stops.
+
+        This undoes the most recent call to Truck.pack when <stops> is the
+        length of the route before that call.
+
+        Precondition: this truck is non-empty, and 1 <= stops <= len(route).
+
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t.unpack(1).parcel_id
+        1
+        >>> t.route, t.available_space
+        (['Toronto'], 10)
+        """
+        old_space = self.available_space
+        p = self.parcels.pop()
+        self.available_space += p.volume
+        for k, size in enumerate(p.dimensions[:len(self.limits)]):
+            self.available_limits[k] += size
+        del self.route[stops:]
+        self.forget_route_distance()
+        for fleet in self._fleets:
+            fleet.truck_changed(self, old_space)
+        return p
+
+    def copy(self) -> 'Truck':
+        """Return a new truck with the same id, capacity, limits, route and
+        parcels as this truck, that is not in any fleet.
+
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> c = t.copy()
+        >>> c.pack(Parcel(2, 5, 'Toronto', 'London'))
+        True
+        >>> t.route, c.route
+        (['Toronto', 'Hamilton'], ['Toronto', 'Hamilton', 'London'])
+        """
+        truck = Truck(self.truck_id, self.capacity, self.route[0],
+                      limits=self.limits)
+        truck.route = type(self.route)(self.route)
+        truck.available_space = self.available_space
+        truck.available_limits = list(self.available_limits)
+        truck.parcels = list(self.parcels)
+        return truck
+
+    def __copy__(self) -> 'Truck':
+        """Return self.copy(), so that a copy of this truck is not in any
+        fleet, and packing it does not change this truck.
+
+        >>> from copy import copy
+        >>> fleet = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> fleet.add_truck(t)
+        >>> copy(t).pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t.route, fleet.num_nonempty_trucks()
+        (['Toronto'], 0)
+        """
+        return self.copy()
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> 'Truck':
+        """Return self.copy() with copies of this truck's parcels.  The
+        fleets this truck is in are not copied.
+        """
+        truck = self.copy()
+        memo[id(self)] = truck
+        truck.parcels = deepcopy(self.parcels, memo)
+        return truck
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state of this truck to pickle, which leaves out the
+        fleets this truck is in and its cached route distance.
+
+        >>> import pickle
+        >>> fleet = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> fleet.add_truck(t)
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> c = pickle.loads(pickle.dumps(t))
+        >>> c.route, c.available_space, c._fleets
+        (['Toronto', 'Hamilton'], 5, [])
+        """
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in _UNPICKLED_TRUCK_SLOTS}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore this truck from <state>, as returned by __getstate__.
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._fleets = []
+        self._route_dmap = None
+        self._route_version = 0
+        self._route_length = 0
+
+    def fits(self, p: Parcel) -> bool:
+        """Return whether parcel <p> fits in this truck's available space
+        and in each of its available limits.
+
+        >>> t = Truck(1423, 10, 'Toronto', limits=(100, 2))
+        >>> t.fits(Parcel(1, 5, 'Toronto', 'Guelph', (80, 3)))
+        False
+        >>> t.fits(Parcel(2, 5, 'Toronto', 'Guelph', (80, 2, 99)))
+        True
+        """
+        return p.volume <= self.available_space and self._fits_limits(p)
+
+    def _fits_limits(self, p: Parcel) -> bool:
+        """Return whether parcel <p> fits in each of this truck's available
+        limits.
+        """
+        for size, left in zip(p.dimensions, self.available_limits):
+            if size > left:
+                return False
+        return True
+
+    @property
+    def packed_p(self) -> List[int]:
+        """Return a list of the IDs of the parcels in this truck, in the order
+        in which they were packed.
+
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> t.pack(Parcel(27, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t.packed_p
+        [27]
+        """
+        return [p.parcel_id for p in self.parcels]
+
+    def route_distance(self, dmap: DistanceMap) -> int:
+        """Return the total distance of this truck's route, from its depot
+        through each stop and back to its depot, according to the distances
+        in <dmap>.  Return 0 if the truck has no stops.
+
+        The distance is cached and updated by Truck.pack, so it is only
+        recomputed from scratch when a different distance map is used, or
+        <dmap> has changed.  If this truck's route is changed other than by
+        Truck.pack, call forget_route_distance afterwards.
+
+        Precondition: <dmap> contains all distances required to compute the
+                      distance travelled.
+
+        >>> from distance_map import DistanceMap
+        >>> m = DistanceMap()
+        >>> m.add_distance('Toronto', 'Hamilton', 9)
+        >>> m.add_distance('Hamilton', 'London', 3, 4)
+        >>> m.add_distance('London', 'Toronto', 10)
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> t.route_distance(m)
+        0
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t.route_distance(m)
+        18
+        >>> t.pack(Parcel(2, 5, 'Toronto', 'London'))
+        True
+        >>> t.route_distance(m)
+        22
+        """
+        if self._route_dmap is not dmap or \
+                self._route_version != dmap.version():
+            legs = dmap.route_distances(self.route)
+            self._route_dmap = dmap
+            self._route_version = dmap.version()
+            self._route_length = sum(legs[:-1])
+        if len(self.route) < 2:
+            return 0
+        return self._route_length + dmap.distance(self.route[-1],
+                                                  self.route[0])
+
+    def forget_route_distance(self) -> None:
+        """Discard the cached distance of this truck's route, so that the
+        next call to route_distance recomputes it.
+        """
+        self._route_dmap = None
+
+    def join_fleet(self, fleet: 'Fleet') -> None:
+        """Record that this truck has been added to <fleet>, so that <fleet>
+        is notified whenever a parcel is packed into this truck.
+
+        This is called by Fleet.add_truck, and does not need to be called
+        directly.
+        """
+        self._fleets.append(fleet)
+
+    def in_snapshot(self) -> bool:
+        """Return whether this truck is in a fleet with an open snapshot.
+
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> t.in_snapshot()
+        False
+        >>> s = f.snapshot()
+        >>> t.in_snapshot()
+        True
+        """
+        return any(fleet.has_snapshot() for fleet in self._fleets)
+
     def fullness(self) -> float:
         """ Return the truck's fullness in percentage points.
 
@@ -143,14 +650,68 @@ class Truck:
         return 100 - self.available_space / self.capacity * 100
 
 
+def _add_exact(partials: List[float], x: float) -> None:
+    """Add <x> to the non-overlapping partial sums <partials>, keeping their
+    exact total equal to the exact sum of every value added, as in the
+    algorithm that math.fsum uses.
+
+    >>> partials = []
+    >>> for x in [0.1, 0.2, -0.1, 1e100, -1e100]:
+    ...     _add_exact(partials, x)
+    >>> fsum(partials) == 0.2
+    True
+    """
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x] if x else []
+
+
 class Fleet:
     """ A fleet of trucks for making deliveries.
 
+    The fleet keeps running totals of the statistics of its trucks, which
+    are updated whenever a truck is added or a parcel is packed into one of
+    its trucks, so that reading a statistic does not loop over the trucks.
+
+    A snapshot of the fleet can be taken, after which every parcel packed
+    into its trucks is recorded in a journal, so that the packing can later
+    be rolled back to the snapshot.  Rolling back takes time proportional to
+    the number of parcels packed since the snapshot, not to the size of the
+    fleet.
+
     ===== Public Attributes =====
     trucks:
       List of all Truck objects in this fleet.
+
+    ===== Private Attributes =====
+    _num_nonempty:
+      The number of non-empty trucks in this fleet.
+    _unused_space:
+      The total available space of the non-empty trucks in this fleet.
+    _fullness:
+      The sum of the fullness of the non-empty trucks in this fleet, as
+      non-overlapping partial sums whose exact total is that sum (see
+      _add_exact).  Adding a truck's fullness and later removing the same
+      value cancels exactly, so the total does not drift as parcels are
+      packed, and there are only ever a few partial sums to add up.
+    _journal:
+      A (truck, route length before packing) pair for each parcel packed
+      into the trucks of this fleet since the first open snapshot, in order,
+      or None if there is no open snapshot.
     """
     trucks: List[Truck]
+    _num_nonempty: int
+    _unused_space: int
+    _fullness: List[float]
+    _journal: Optional[List[Tuple[Truck, int]]]
 
     def __init__(self) -> None:
         """Create a Fleet with no trucks.
@@ -160,6 +721,10 @@ class Fleet:
         0
         """
         self.trucks = []
+        self._num_nonempty = 0
+        self._unused_space = 0
+        self._fullness = []
+        self._journal = None
 
     def add_truck(self, truck: Truck) -> None:
         """Add <truck> to this fleet.
@@ -174,6 +739,113 @@ class Fleet:
         1
         """
         self.trucks.append(truck)
+        truck.join_fleet(self)
+        self._count(truck, truck.available_space, 1)
+
+    def truck_changed(self, truck: Truck, old_space: int) -> None:
+        """Update the statistics of this fleet after the available space of
+        <truck>, one of its trucks, changed from <old_space>.
+
+        This is called by Truck.pack and Truck.unpack, and does not need to
+        be called directly.
+
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> t.available_space = 4
+        >>> f.truck_changed(t, 10)
+        >>> f.total_unused_space()
+        4
+        """
+        self._count(truck, old_space, -1)
+        self._count(truck, truck.available_space, 1)
+
+    def truck_packed(self, truck: Truck, old_space: int,
+                     old_stops: int) -> None:
+        """Update this fleet after a parcel was packed into <truck>, one of
+        its trucks, which had <old_space> available space and <old_stops>
+        stops on its route beforehand.
+
+        This is called by Truck.pack, and does not need to be called
+        directly.
+        """
+        self.truck_changed(truck, old_space)
+        if self._journal is not None:
+            self._journal.append((truck, old_stops))
+
+    def snapshot(self) -> int:
+        """Return a snapshot of the parcels packed into this fleet's trucks,
+        which can be passed to rollback to undo all packing since now.
+
+        Packing is only recorded while there are open snapshots, that is,
+        until commit is called.
+
+        >>> f = Fleet()
+        >>> t = Truck(1423, 10, 'Toronto')
+        >>> f.add_truck(t)
+        >>> s = f.snapshot()
+        >>> t.pack(Parcel(1, 5, 'Toronto', 'Hamilton'))
+        True
+        >>> t.pack(Parcel(2, 4, 'Toronto', 'London'))
+        True
+        >>> [p.parcel_id for _, p in f.rollback(s)]
+        [1, 2]
+        >>> t.route, f.num_nonempty_trucks()
+        (['Toronto'], 0)
+        """
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def rollback(self, snapshot: int) -> List[Tuple[Truck, Parcel]]:
+        """Undo the packing of every parcel into this fleet's trucks since
+        <snapshot> was taken, most recent first, and return the undone
+        (truck, parcel) pairs in the order in which they were packed.
+
+        Packing the returned pairs again in order redoes the rolled back
+        plan.  <snapshot> remains open, and can be rolled back to again.
+
+        Precondition: <snapshot> was returned by self.snapshot() since the
+        last call to self.commit(), and was not rolled past by an earlier
+        rollback.  Since it was taken, the trucks in this fleet have only
+        been changed by Truck.pack.
+        """
+        undone = []
+        while len(self._journal) > snapshot:
+            truck, old_stops = self._journal.pop()
+            undone.append((truck, truck.unpack(old_stops)))
+        undone.reverse()
+        return undone
+
+    def commit(self) -> None:
+        """Close every open snapshot of this fleet, keeping the packing done
+        since they were taken, and stop recording packing.
+        """
+        self._journal = None
+
+    def has_snapshot(self) -> bool:
+        """Return whether this fleet has an open snapshot.
+
+        >>> f = Fleet()
+        >>> s = f.snapshot()
+        >>> f.has_snapshot()
+        True
+        >>> f.commit()
+        >>> f.has_snapshot()
+        False
+        """
+        return self._journal is not None
+
+    def _count(self, truck: Truck, space: int, sign: int) -> None:
+        """Add the statistics of <truck>, if it had <space> available space,
+        to the running totals of this fleet if <sign> is 1, or remove them if
+        <sign> is -1.
+        """
+        if space < truck.capacity:
+            self._num_nonempty += sign
+            self._unused_space += sign * space
+            _add_exact(self._fullness,
+                       sign * (truck.capacity - space) * 100 / truck.capacity)
 
     # We will not test the format of the string that you return -- it is up
     # to you.
@@ -225,11 +897,7 @@ class Fleet:
         >>> f.num_nonempty_trucks()
         2
         """
-        num_non_empty = 0
-        for truck in self.trucks:
-            if truck.fullness() > 0:
-                num_non_empty += 1
-        return num_non_empty
+        return self._num_nonempty
 
     def parcel_allocations(self) -> Dict[int, List[int]]:
         """Return a dictionary in which each key is the ID of a truck in this
@@ -274,11 +942,7 @@ class Fleet:
         >>> f.total_unused_space()
         995
         """
-        empty_space = 0
-        for truck in self.trucks:
-            if truck.fullness() > 0:
-                empty_space += truck.available_space
-        return empty_space
+        return self._unused_space
 
     def _total_fullness(self) -> float:
         """Return the sum of truck.fullness() for each non-empty truck in the
@@ -297,11 +961,7 @@ class Fleet:
         >>> f._total_fullness()
         50.0
         """
-        total_fullness = 0
-        for truck in self.trucks:
-            if truck.fullness() > 0:
-                total_fullness += truck.fullness()
-        return total_fullness
+        return fsum(self._fullness)
 
     def average_fullness(self) -> float:
         """Return the average percent fullness of all non-empty trucks in the
@@ -317,12 +977,26 @@ class Fleet:
         >>> f.add_truck(t)
         >>> f.average_fullness()
         50.0
+        >>> f = Fleet()
+        >>> for i, capacity in enumerate([3, 7]):
+        ...     t = Truck(i, capacity, 'Toronto')
+        ...     f.add_truck(t)
+        ...     _ = t.pack(Parcel(i, capacity, 'Buffalo', 'Hamilton'))
+        >>> f.average_fullness()
+        100.0
+
+        Reading it takes constant time, however many different capacities
+        the trucks have:
+
+        >>> f = Fleet()
+        >>> for i in range(1, 5001):
+        ...     t = Truck(i, i, 'Toronto')
+        ...     f.add_truck(t)
+        ...     _ = t.pack(Parcel(i, (i + 1) // 2, 'Buffalo', 'Hamilton'))
+        >>> len(f._fullness) <= 4
+        True
         """
-        fullness_avg = 0
-        for truck in self.trucks:
-            if truck.fullness() > 0:
-                fullness_avg += truck.fullness() / len(self.trucks)
-        return fullness_avg
+        return fsum(self._fullness) / len(self.trucks)
 
     def total_distance_travelled(self, dmap: DistanceMap) -> int:
         """Return the total distance travelled by the trucks in this fleet,
@@ -347,20 +1021,18 @@ class Fleet:
         >>> f.add_truck(t2)
         >>> f.total_distance_travelled(m)
         36
+        >>> m.add_distance('Hamilton', 'London', 4)
+        >>> m.add_distance('London', 'Toronto', 10)
+        >>> t3 = Truck(1444, 10, 'Toronto', unique_stops=True)
+        >>> for i, city in enumerate(['Hamilton', 'London', 'Hamilton']):
+        ...     _ = t3.pack(Parcel(i, 1, 'Toronto', city))
+        >>> f.add_truck(t3)
+        >>> f.total_distance_travelled(m)
+        59
         """
         total_distance = 0
-
         for truck in self.trucks:
-            if len(truck.route) > 1:
-                tuple_route = []  # make a list w tuples for dmap usage
-                i = 1
-                while i < len(truck.route):
-                    tuple_route.append((truck.route[i - 1], truck.route[i]))
-                    i += 1
-                tuple_route.append((truck.route[-1], truck.route[0]))
-                for tup in tuple_route:
-                    total_distance += dmap.distance(tup[0], tup[1])
-
+            total_distance += truck.route_distance(dmap)
         return total_distance
 
     def average_distance_travelled(self, dmap: DistanceMap) -> float:
@@ -404,6 +1076,7 @@ if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'array', 'copy', 'math',
                                    'distance_map'],
         'disable': ['E1136'],
         'max-attributes': 15,
@@ -26,60 +26,211 @@ in testing.  However, your best test cases will likely be very small ones that
 you hand-craft to force important conditions to arise.
 """
 
-from random import randint, choice
+from math import gcd, hypot
+from random import Random
+from typing import Iterator, List, Optional, Tuple
+from domain import Parcel, Truck
+
+DEFAULT_CITIES = ['Belleville', 'Guelph', 'Hamilton', 'Toronto', 'London',
+                  'Ottawa']
+
+
+def make_cities(num_cities: int) -> List[str]:
+    """Return a list of <num_cities> distinct city names.
+
+    >>> make_cities(3)
+    ['City0', 'City1', 'City2']
+    """
+    return [f'City{i}' for i in range(num_cities)]
+
+
+def _unique_ids(rng: Random, n: int, id_range: int) -> Iterator[int]:
+    """Yield <n> distinct ids between 0 and <id_range> - 1 in random order,
+    using constant memory.
+
+    Precondition: 0 <= n <= id_range
+    """
+    # i -> (step * i + offset) % id_range is a permutation of the ids when
+    # step is coprime to id_range.
+    step = rng.randrange(1, max(2, id_range))
+    while gcd(step, id_range) != 1:
+        step = rng.randrange(1, id_range)
+    offset = rng.randrange(id_range) if id_range > 0 else 0
+    for i in range(n):
+        yield (step * i + offset) % id_range
+
+
+def iter_parcels(num_parcels: int, cities: List[str], depot: str,
+                 min_volume: int = 5, max_volume: int = 25,
+                 volume_mode: Optional[int] = None,
+                 destination_skew: float = 0.0,
+                 seed: Optional[int] = None) -> Iterator[Parcel]:
+    """Yield <num_parcels> random parcels travelling between <cities>.
+
+    Each parcel has a distinct id.  Its source is chosen uniformly from
+    <cities>, and its destination is any other city, except that parcels
+    not starting at <depot> are not sent to <depot>.  Destinations are
+    weighted by a Zipf distribution with exponent <destination_skew>, so that
+    earlier cities in <cities> are more popular; a skew of 0 chooses
+    destinations uniformly.
+
+    Volumes are between <min_volume> and <max_volume>, inclusive.  They are
+    uniformly distributed if <volume_mode> is None, and otherwise follow a
+    triangular distribution peaking at <volume_mode>.
+
+    The same <seed> always produces the same parcels.
+
+    Preconditions:
+    - <cities> contains <depot> and at least two other cities.
+    - 0 < min_volume <= max_volume
+    - volume_mode is None or min_volume <= volume_mode <= max_volume
+
+    >>> parcels = list(iter_parcels(100, DEFAULT_CITIES, 'Toronto', seed=1))
+    >>> len({p.parcel_id for p in parcels})
+    100
+    >>> all(p.start != p.end for p in parcels)
+    True
+    >>> again = iter_parcels(100, DEFAULT_CITIES, 'Toronto', seed=1)
+    >>> [(p.parcel_id, p.volume, p.end) for p in again] == \\
+    ...     [(p.parcel_id, p.volume, p.end) for p in parcels]
+    True
+    """
+    rng = Random(seed)
+    ids = _unique_ids(rng, num_parcels, num_parcels + (num_parcels + 2) // 3)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(cities)):
+        total += 1 / (rank + 1) ** destination_skew
+        cum_weights.append(total)
+
+    for parcel_id in ids:
+        source = rng.choice(cities)
+        destination = source
+        while destination == source or \
+                (source != depot and destination == depot):
+            destination = rng.choices(cities, cum_weights=cum_weights)[0]
+        if volume_mode is None:
+            volume = rng.randint(min_volume, max_volume)
+        else:
+            volume = round(rng.triangular(min_volume, max_volume,
+                                          volume_mode))
+        yield Parcel(parcel_id, volume, source, destination)
+
+
+def make_trucks(num_trucks: int, depot: str, min_capacity: int = 20,
+                max_capacity: int = 50,
+                seed: Optional[int] = None) -> List[Truck]:
+    """Return a list of <num_trucks> empty trucks based at <depot>, with
+    distinct ids and capacities chosen uniformly between <min_capacity> and
+    <max_capacity>, inclusive.
+
+    The same <seed> always produces the same trucks.
+
+    Precondition: 0 < min_capacity <= max_capacity
+
+    >>> trucks = make_trucks(5, 'Toronto', seed=1)
+    >>> [t.capacity for t in trucks] == \\
+    ...     [t.capacity for t in make_trucks(5, 'Toronto', seed=1)]
+    True
+    """
+    rng = Random(seed)
+    return [Truck(truck_id, rng.randint(min_capacity, max_capacity), depot)
+            for truck_id in _unique_ids(rng, num_trucks, 2 * num_trucks)]
+
+
+def iter_distances(cities: List[str], density: float = 1.0,
+                   seed: Optional[int] = None) \
+        -> Iterator[Tuple[str, str, int]]:
+    """Yield (city1, city2, distance) for pairs of distinct cities in
+    <cities>, where distance is the distance in both directions.
+
+    Cities are placed at random points on a map, and the distance between
+    two cities is their straight-line distance, rounded up to a positive
+    integer.  Each pair of cities is included with probability <density>.
+
+    The same <seed> always produces the same distances.
+
+    >>> distances = list(iter_distances(['A', 'B', 'C'], seed=1))
+    >>> [(c1, c2) for c1, c2, _ in distances]
+    [('A', 'B'), ('A', 'C'), ('B', 'C')]
+    """
+    rng = Random(seed)
+    points = [(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in cities]
+    for i, (x1, y1) in enumerate(points):
+        for j in range(i + 1, len(cities)):
+            if density >= 1.0 or rng.random() < density:
+                x2, y2 = points[j]
+                yield cities[i], cities[j], int(hypot(x2 - x1, y2 - y1)) + 1
+
+
+def _write_lines(filename: str, lines: Iterator[str],
+                 chunk_size: int) -> None:
+    """Write <lines> to <filename>, joining them into chunks of <chunk_size>
+    lines to reduce the number of writes.
+    """
+    with open(filename, 'w') as file:
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                file.write(''.join(chunk))
+                chunk = []
+        file.write(''.join(chunk))
 
 
 def generate(parcel_filename: str = 'data/demo-parcel-data.txt',
-             truck_filename: str = 'data/demo-truck-data.txt') -> None:
+             truck_filename: str = 'data/demo-truck-data.txt',
+             map_filename: Optional[str] = None,
+             num_parcels: int = 15, num_trucks: int = 5,
+             cities: Optional[List[str]] = None, depot: str = 'Toronto',
+             min_volume: int = 5, max_volume: int = 25,
+             volume_mode: Optional[int] = None,
+             destination_skew: float = 0.0,
+             min_capacity: int = 20, max_capacity: int = 50,
+             map_density: float = 1.0, seed: Optional[int] = None,
+             chunk_size: int = 10000) -> None:
     """Generate random truck and parcel data, and save to the files
     <parcel_filename> and <truck_filename> respectively. File format is as
     defined in Assignment 1.
+
+    If <map_filename> is given, also save the distances between the cities
+    to it, one pair of cities per line, in the format
+        city1, city2, distance
+
+    <cities> defaults to a handful of Ontario cities, and must contain
+    <depot>.  Use make_cities to create a larger list.  The remaining
+    parameters are as described in iter_parcels, make_trucks and
+    iter_distances.  Files are written <chunk_size> lines at a time, and the
+    same <seed> always produces the same files.
     """
-    # Set constants controlling parcel data
-    num_ids_to_pick_from = 20
-    num_ids = 15
-    cities = ['Belleville', 'Guelph', 'Hamilton', 'Toronto', 'London', 'Ottawa']
-    min_volume = 5
-    max_volume = 25
-
-    depot = 'Toronto'
-
-    # Generate some random parcels
-    ids = list(range(num_ids_to_pick_from))
-    with open(parcel_filename, 'w') as file:
-        for dummy in range(num_ids):
-            # Pick a random id from among those left and remove it so we
-            # don't pick it again.
-            id_ = choice(ids)
-            ids.remove(id_)
-            source = choice(cities)
-            temp = cities.copy()
-            temp.remove(source)
-            if source != depot:
-                temp.remove(depot)
-            destination = choice(temp)
-            volume = randint(min_volume, max_volume)
-            file.write(f'{id_}, {source}, {destination}, {volume}\n')
-
-    # Set constants controlling truck data
-    num_ids_to_pick_from = 10
-    num_ids = 5
-    min_volume = 20
-    max_volume = 50
-
-    # Generate some random trucks
-    ids = list(range(num_ids_to_pick_from))
-    with open(truck_filename, 'w') as file:
-        for dummy in range(num_ids):
-            # Pick a random id from among those left and remove it so we
-            # don't pick it again.
-            id_ = choice(ids)
-            ids.remove(id_)
-            volume = randint(min_volume, max_volume)
-            file.write(f'{id_}, {volume}\n')
+    if cities is None:
+        cities = DEFAULT_CITIES
+    rng = Random(seed)
+
+    parcels = iter_parcels(num_parcels, cities, depot, min_volume,
+                           max_volume, volume_mode, destination_skew,
+                           rng.random())
+    _write_lines(parcel_filename,
+                 (f'{p.parcel_id}, {p.start}, {p.end}, {p.volume}\n'
+                  for p in parcels), chunk_size)
+
+    trucks = make_trucks(num_trucks, depot, min_capacity, max_capacity,
+                         rng.random())
+    _write_lines(truck_filename,
+                 (f'{t.truck_id}, {t.capacity}\n' for t in trucks),
+                 chunk_size)
+
+    if map_filename is not None:
+        distances = iter_distances(cities, map_density, rng.random())
+        _write_lines(map_filename,
+                     (f'{c1}, {c2}, {d}\n' for c1, c2, d in distances),
+                     chunk_size)
 
 
 if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
     import python_ta
     python_ta.check_all(config='.pylintrc')
     generate()
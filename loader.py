@@ -0,0 +1,288 @@
+"""Assignment 1 - Parcel and Truck data loader
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module reads the parcel and truck data files written by module
+generator.  Parcel files have one parcel per line, in the format
+    id, source, destination, volume
+truck files have one truck per line, in the format
+    id, capacity
+and distance map files have one pair of cities per line, in the format
+    city1, city2, distance1[, distance2]
+A distance map file can also be converted once to the binary format of
+module distance_file, which opens without being parsed.
+
+Files are read one line at a time, so that files larger than memory can be
+scheduled in fixed-size chunks.  City names are interned, so that each city
+name is stored only once no matter how many parcels refer to it.
+
+Each reader takes either the name of a file or a text file that is already
+open, such as an io.StringIO.  Lines that cannot be parsed are skipped.  If
+an <on_error> function is given, it is called with the line number and text
+of each skipped line.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple, \
+    Union
+from distance_map import DistanceMap
+from distance_file import save_distance_map
+from domain import Parcel, ParcelTable, Truck
+
+ErrorHandler = Optional[Callable[[int, str], None]]
+Source = Union[str, TextIO]
+
+
+def _numbered_lines(source: Source) -> Iterator[Tuple[int, str]]:
+    """Yield the line number, counting from 1, and text of each line of
+    <source>, in order.
+
+    If <source> is the name of a file, the file is opened here and closed
+    once every line has been read.  An open file is read from its current
+    position, and is left open.
+    """
+    if isinstance(source, str):
+        with open(source) as file:
+            yield from enumerate(file, 1)
+    else:
+        yield from enumerate(source, 1)
+
+
+def _parcel_records(source: Source, on_error: ErrorHandler) \
+        -> Iterator[Tuple[int, int, str, str]]:
+    """Yield the (id, volume, source, destination) of each parcel in the
+    parcel file <source>, in order.
+
+    Blank lines are skipped.  Lines that are not in the parcel file format,
+    or whose volume is not a positive integer, are reported to <on_error>,
+    if given, and skipped.
+    """
+    for line_number, line in _numbered_lines(source):
+        fields = line.split(',')
+        try:
+            if len(fields) != 4:
+                raise ValueError
+            parcel_id = int(fields[0])
+            volume = int(fields[3])
+            if volume <= 0:
+                raise ValueError
+        except ValueError:
+            if line.strip() and on_error is not None:
+                on_error(line_number, line.rstrip('\n'))
+            continue
+        yield parcel_id, volume, fields[1].strip(), fields[2].strip()
+
+
+def read_parcels(source: Source, on_error: ErrorHandler = None,
+                 cities: Optional[Dict[str, str]] = None) -> Iterator[Parcel]:
+    """Yield a Parcel for each line of the parcel file <source>, in order.
+
+    City names are interned using <cities>, which maps each city name to the
+    string object used for it, and is updated with any new cities.  Pass the
+    same dictionary to several calls to share city names between them.
+
+    Malformed lines are reported to <on_error>, if given, and skipped.
+
+    >>> from io import StringIO
+    >>> data = StringIO('1, Toronto, Hamilton, 5\\n'
+    ...                 '\\n'
+    ...                 '2, Toronto, London\\n'
+    ...                 '3, Toronto, Hamilton, 0\\n'
+    ...                 '4, Guelph, Toronto, 8\\n')
+    >>> parcels = list(read_parcels(data, lambda n, line: print(n, line)))
+    3 2, Toronto, London
+    4 3, Toronto, Hamilton, 0
+    >>> [(p.parcel_id, p.start, p.end, p.volume) for p in parcels]
+    [(1, 'Toronto', 'Hamilton', 5), (4, 'Guelph', 'Toronto', 8)]
+    >>> parcels[0].start is parcels[1].end
+    True
+    """
+    if cities is None:
+        cities = {}
+    for parcel_id, volume, start, end in _parcel_records(source, on_error):
+        yield Parcel(parcel_id, volume, cities.setdefault(start, start),
+                     cities.setdefault(end, end))
+
+
+def read_parcel_chunks(source: Source, chunk_size: int,
+                       on_error: ErrorHandler = None) \
+        -> Iterator[List[Parcel]]:
+    """Yield the parcels in the parcel file <source> in lists of
+    <chunk_size> parcels, in order.  The last list may be shorter.
+
+    City names are interned across all chunks.  Malformed lines are reported
+    to <on_error>, if given, and skipped, and do not count towards a chunk.
+
+    Precondition: chunk_size > 0
+
+    >>> from io import StringIO
+    >>> data = StringIO('1, A, B, 1\\n2, A, C, 2\\nbad\\n3, A, B, 3\\n'
+    ...                 '4, A, C, 4\\n5, A, B, 5\\n')
+    >>> chunks = read_parcel_chunks(data, 2, lambda n, line: print(n, line))
+    >>> for chunk in chunks:
+    ...     print([p.parcel_id for p in chunk])
+    [1, 2]
+    3 bad
+    [3, 4]
+    [5]
+    >>> list(read_parcel_chunks(StringIO(''), 2))
+    []
+    """
+    chunk = []
+    for parcel in read_parcels(source, on_error):
+        chunk.append(parcel)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_parcel_table(source: Source,
+                      on_error: ErrorHandler = None) -> ParcelTable:
+    """Return a ParcelTable containing the parcels in the parcel file
+    <source>, in order, without creating a Parcel for each of them.
+
+    Malformed lines are reported to <on_error>, if given, and skipped.
+
+    >>> from io import StringIO
+    >>> data = StringIO('7, Toronto, Guelph, 3\\n'
+    ...                 'x, Toronto, Guelph, 3\\n'
+    ...                 '9, Guelph, Toronto, 4\\n')
+    >>> table = read_parcel_table(data, lambda n, line: print(n, line))
+    2 x, Toronto, Guelph, 3
+    >>> list(table.parcel_ids), list(table.volumes), table.cities
+    ([7, 9], [3, 4], ['Toronto', 'Guelph'])
+    """
+    table = ParcelTable()
+    for parcel_id, volume, start, end in _parcel_records(source, on_error):
+        table.add(parcel_id, volume, start, end)
+    return table
+
+
+def read_trucks(source: Source, depot: str,
+                on_error: ErrorHandler = None) -> Iterator[Truck]:
+    """Yield an empty Truck based at <depot> for each line of the truck file
+    <source>, in order.
+
+    Blank lines are skipped.  Lines that are not in the truck file format,
+    or whose capacity is not a positive integer, are reported to <on_error>,
+    if given, and skipped.
+
+    >>> from io import StringIO
+    >>> data = StringIO('1, 10\\n2, -5\\n\\n3, 20, 4\\n4, 15\\n')
+    >>> trucks = list(read_trucks(data, 'Toronto',
+    ...                           lambda n, line: print(n, line)))
+    2 2, -5
+    4 3, 20, 4
+    >>> [(t.truck_id, t.capacity, t.route) for t in trucks]
+    [(1, 10, ['Toronto']), (4, 15, ['Toronto'])]
+    """
+    for line_number, line in _numbered_lines(source):
+        fields = line.split(',')
+        try:
+            if len(fields) != 2:
+                raise ValueError
+            truck_id = int(fields[0])
+            capacity = int(fields[1])
+            if capacity <= 0:
+                raise ValueError
+        except ValueError:
+            if line.strip() and on_error is not None:
+                on_error(line_number, line.rstrip('\n'))
+            continue
+        yield Truck(truck_id, capacity, depot)
+
+
+def read_distance_map(source: Source,
+                      on_error: ErrorHandler = None) -> DistanceMap:
+    """Return a DistanceMap containing the distances in the distance map
+    file <source>.
+
+    As in DistanceMap.add_distance, distance1 is the distance from city1 to
+    city2, and distance2, if given, is the distance from city2 to city1.
+
+    Blank lines are skipped.  Lines that are not in the distance map file
+    format, or whose distances are not positive integers, are reported to
+    <on_error>, if given, and skipped.
+
+    >>> from io import StringIO
+    >>> data = StringIO('Toronto, Hamilton, 9\\n'
+    ...                 'Toronto, London, 4, 5\\n'
+    ...                 'Toronto, Guelph, 0\\n'
+    ...                 'Guelph, Ottawa\\n')
+    >>> dmap = read_distance_map(data, lambda n, line: print(n, line))
+    3 Toronto, Guelph, 0
+    4 Guelph, Ottawa
+    >>> dmap.distance('Hamilton', 'Toronto')
+    9
+    >>> dmap.distance('Toronto', 'London'), dmap.distance('London', 'Toronto')
+    (4, 5)
+    >>> dmap.distance('Toronto', 'Guelph')
+    -1
+    """
+    dmap = DistanceMap()
+    for line_number, line in _numbered_lines(source):
+        fields = line.split(',')
+        try:
+            if len(fields) not in (3, 4):
+                raise ValueError
+            distances = [int(field) for field in fields[2:]]
+            if min(distances) <= 0:
+                raise ValueError
+        except ValueError:
+            if line.strip() and on_error is not None:
+                on_error(line_number, line.rstrip('\n'))
+            continue
+        dmap.add_distance(fields[0].strip(), fields[1].strip(), *distances)
+    return dmap
+
+
+def convert_distance_map(source: Source, binary_filename: str,
+                         on_error: ErrorHandler = None) -> None:
+    """Convert the distance map file <source> to the binary distance map
+    file <binary_filename>, which can be opened with
+    distance_file.MappedDistanceMap.
+
+    Lines of <source> are read as in read_distance_map.
+
+    >>> import os, tempfile
+    >>> from io import StringIO
+    >>> from distance_file import MappedDistanceMap
+    >>> data = StringIO('Toronto, London, 4, 5\\nToronto, London\\n')
+    >>> filename = os.path.join(tempfile.mkdtemp(), 'map.bin')
+    >>> convert_distance_map(data, filename, lambda n, line: print(n, line))
+    2 Toronto, London
+    >>> with MappedDistanceMap(filename) as mapped:
+    ...     mapped.distance('Toronto', 'London'), mapped.distance('London',
+    ...                                                          'Toronto')
+    (4, 5)
+    """
+    save_distance_map(read_distance_map(source, on_error), binary_filename)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['_numbered_lines'],
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'distance_map', 'distance_file',
+                                   'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
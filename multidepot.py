@@ -0,0 +1,198 @@
+"""Assignment 1 - Multi-depot scheduling
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the MultiDepotScheduler class, which schedules parcels
+for a network of depots by splitting the parcels and trucks into one shard
+per depot and scheduling the shards in parallel worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from domain import Parcel, Route, Truck
+from scheduler import GreedyScheduler, Scheduler
+
+# A shard to schedule: a GreedyScheduler configuration, the (volume,
+# destination, dimensions) of each parcel starting at one depot, and the
+# (available space, stops, available limits) of each truck based there.  The
+# stops of a truck are its last stop if its route is a list, and all of its
+# stops if it is a Route.
+Shard = Tuple[Dict[str, str], List[Tuple[int, str, Tuple[int, ...]]],
+              List[Tuple[int, Union[str, List[str]], Tuple[int, ...]]]]
+
+# The parcels packed onto each truck of a shard, in the order they were
+# packed, and the parcels that were not packed, as positions in the shard's
+# list of parcels.
+ShardResult = Tuple[List[List[int]], List[int]]
+
+
+def _shard(config: Dict[str, str], parcels: List[Parcel],
+           trucks: List[Truck]) -> Shard:
+    """Return a shard for scheduling <parcels> onto <trucks> with <config>.
+
+    A shard holds only what the greedy algorithm looks at, so that it is
+    cheap to send to a worker process.
+    """
+    return (config, [(p.volume, p.end, p.dimensions) for p in parcels],
+            [(t.available_space,
+              list(t.route) if isinstance(t.route, Route) else t.route[-1],
+              tuple(t.available_limits))
+             for t in trucks])
+
+
+def _schedule_shard(shard: Shard) -> ShardResult:
+    """Schedule the parcels of <shard> onto its trucks, and return where
+    each parcel went.
+    """
+    config, parcel_data, truck_data = shard
+    # Stand-ins with the same volume, destination, dimensions, available
+    # space, stops and available limits are scheduled exactly as the real
+    # parcels and trucks would be.  Each stand-in parcel's id is its position
+    # in the shard.
+    parcels = [Parcel(i, volume, '', end, dimensions)
+               for i, (volume, end, dimensions) in enumerate(parcel_data)]
+    trucks = []
+    for i, (space, stops, limits) in enumerate(truck_data):
+        if isinstance(stops, list):
+            truck = Truck(i, space, stops[0], unique_stops=True,
+                          limits=limits)
+            truck.route = Route(stops)
+        else:
+            truck = Truck(i, space, stops, limits=limits)
+        trucks.append(truck)
+    left = GreedyScheduler(config).schedule(parcels, trucks)
+    return [truck.packed_p for truck in trucks], \
+        [p.parcel_id for p in left]
+
+
+class MultiDepotScheduler(Scheduler):
+    """A scheduler for trucks based at several depots.
+
+    Each parcel is first scheduled onto the trucks based at the depot where
+    it starts, as a GreedyScheduler with the given configuration would
+    schedule it.  Each depot is scheduled in its own worker process.  The
+    parcels that do not fit at their own depot, or that start where no truck
+    is based, are then scheduled onto all of the trucks together, in this
+    process.
+
+    The trucks passed to schedule are packed as if every shard had been
+    scheduled in this process, so a Fleet holding them stays up to date.
+
+    === Private Attributes ===
+    _config: The GreedyScheduler configuration used for every shard and for
+    the overflow pass.
+    _max_workers: The number of worker processes to use, or None to use
+    one per CPU.  If it is 1, or there is only one depot to schedule, each
+    depot's trucks are scheduled directly in this process.
+
+    === Sample Usage ===
+    >>> from domain import Fleet
+    >>> config = {'parcel_priority': 'volume',
+    ...           'parcel_order': 'non-increasing',
+    ...           'truck_order': 'non-decreasing'}
+    >>> fleet = Fleet()
+    >>> fleet.add_truck(Truck(1, 10, 'Toronto'))
+    >>> fleet.add_truck(Truck(2, 12, 'Ottawa'))
+    >>> parcels = [Parcel(1, 8, 'Toronto', 'Guelph'),
+    ...            Parcel(2, 4, 'Toronto', 'London'),
+    ...            Parcel(3, 3, 'Ottawa', 'Kingston'),
+    ...            Parcel(4, 5, 'Ottawa', 'Montreal'),
+    ...            Parcel(5, 9, 'Hamilton', 'London')]
+    >>> scheduler = MultiDepotScheduler(config, max_workers=1)
+    >>> [p.parcel_id for p in scheduler.schedule(parcels, fleet.trucks)]
+    [5]
+    >>> fleet.parcel_allocations() == {1: [1], 2: [4, 3, 2]}
+    True
+    >>> fleet.total_unused_space()
+    2
+
+    Parcels over a truck's limits are left unscheduled, not lost:
+
+    >>> t = Truck(1, 10, 'Toronto', limits=(5,))
+    >>> p = Parcel(1, 3, 'Toronto', 'Guelph', (9,))
+    >>> scheduler.schedule([p], [t]) == [p], t.parcels
+    (True, [])
+    """
+    _config: Dict[str, Union[str, bool]]
+    _max_workers: Optional[int]
+
+    def __init__(self, config: Dict[str, Union[str, bool]],
+                 max_workers: Optional[int] = None) -> None:
+        """Initialize this scheduler to schedule each depot, and then the
+        overflow, as a GreedyScheduler with <config> would, using
+        <max_workers> worker processes.
+        """
+        self._config = config
+        self._max_workers = max_workers
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the parcels in <parcels> onto trucks in <trucks>, first
+        by depot and then all together.
+
+        Return a list containing the parcels that could not be scheduled.
+        """
+        depots = {}
+        for truck in trucks:
+            depots.setdefault(truck.route[0], []).append(truck)
+        shard_parcels = {depot: [] for depot in depots}
+        overflow = []
+        for parcel in parcels:
+            if parcel.start in shard_parcels:
+                shard_parcels[parcel.start].append(parcel)
+            else:
+                overflow.append(parcel)
+
+        order = [depot for depot in depots if shard_parcels[depot]]
+        scheduler = GreedyScheduler(self._config)
+        if self._max_workers == 1 or len(order) <= 1:
+            # Without parallelism, shards and stand-ins are pure overhead.
+            for depot in order:
+                overflow.extend(scheduler.schedule(shard_parcels[depot],
+                                                   depots[depot]))
+            return scheduler.schedule(overflow, trucks)
+
+        shards = [_shard(self._config, shard_parcels[depot], depots[depot])
+                  for depot in order]
+        with ProcessPoolExecutor(self._max_workers) as pool:
+            results = list(pool.map(_schedule_shard, shards))
+
+        # Replay each shard's packing onto the real trucks.
+        for depot, (packed, left) in zip(order, results):
+            ps = shard_parcels[depot]
+            for truck, positions in zip(depots[depot], packed):
+                for i in positions:
+                    if not truck.pack(ps[i]):
+                        overflow.append(ps[i])
+            overflow.extend(ps[i] for i in left)
+
+        return scheduler.schedule(overflow, trucks)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'concurrent.futures', 'domain',
+                                   'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
@@ -0,0 +1,226 @@
+"""Assignment 1 - Scheduler portfolio
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module schedules the same parcels onto the same fleet with many
+schedulers in parallel, and ranks the results using the Fleet statistics.
+
+The parcels, the distance map and a compact copy of the trucks are sent to
+each worker process once.  Each run then rebuilds its own trucks from that
+copy, so that no run sees the parcels packed by another, and the caller's
+trucks are never changed.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from distance_map import DistanceMap
+from domain import Fleet, Parcel, Route, Truck
+from scheduler import GREEDY_CONFIGS, GreedyScheduler, SeededRandomScheduler
+
+# The state of a truck: its id, capacity, depot, the parcels in it, whether
+# its route visits each city once, and its limits.
+TruckState = Tuple[int, int, str, List[Parcel], bool, Tuple[int, ...]]
+
+# A scheduler to run: either a GreedyScheduler configuration, or the seed
+# for a SeededRandomScheduler.
+Strategy = Union[Dict[str, str], int]
+
+# The data shared by every run in a process, set by _share.  In this
+# process it is cleared again once run_portfolio is done with it.
+_shared: Dict[str, Any] = {}
+
+
+class PortfolioResult:
+    """The result of scheduling parcels onto a fleet with one scheduler.
+
+    === Public Attributes ===
+    strategy: The GreedyScheduler configuration used, or the seed of the
+    SeededRandomScheduler used.
+    unscheduled: The IDs of the parcels that could not be scheduled.
+    allocations: The IDs of the parcels packed onto each truck, keyed by
+    truck ID, as in Fleet.parcel_allocations.
+    unused_space: The total unused space of the non-empty trucks.
+    average_fullness: The average fullness of the trucks, or 0.0 if every
+    truck is empty.
+    average_distance: The average distance travelled by the trucks that
+    travelled, or 0.0 if no truck travelled or no distance map was given.
+    """
+    strategy: Strategy
+    unscheduled: List[int]
+    allocations: Dict[int, List[int]]
+    unused_space: int
+    average_fullness: float
+    average_distance: float
+
+    def __init__(self, strategy: Strategy, unscheduled: List[int],
+                 fleet: Fleet, dmap: Optional[DistanceMap]) -> None:
+        """Initialize this result of scheduling with <strategy>, which left
+        the parcels with IDs in <unscheduled> and packed the trucks in
+        <fleet>.  Distances are measured with <dmap>, if given.
+        """
+        self.strategy = strategy
+        self.unscheduled = unscheduled
+        self.allocations = fleet.parcel_allocations()
+        self.unused_space = fleet.total_unused_space()
+        self.average_fullness = 0.0
+        self.average_distance = 0.0
+        if fleet.num_nonempty_trucks() > 0:
+            self.average_fullness = fleet.average_fullness()
+            if dmap is not None:
+                self.average_distance = fleet.average_distance_travelled(dmap)
+
+    def __repr__(self) -> str:
+        """Return a string representation of this result.
+        """
+        return f'PortfolioResult({self.strategy!r}, ' \
+               f'unscheduled={len(self.unscheduled)}, ' \
+               f'unused_space={self.unused_space}, ' \
+               f'average_fullness={self.average_fullness:.2f}, ' \
+               f'average_distance={self.average_distance:.2f})'
+
+    def rank_key(self) -> Tuple[int, float, float]:
+        """Return the key by which results are ranked: results with less
+        unused space come first, then those with greater average fullness,
+        then those with shorter average distance.
+        """
+        return self.unused_space, -self.average_fullness, \
+            self.average_distance
+
+
+def fleet_state(trucks: List[Truck]) -> List[TruckState]:
+    """Return the state of each truck in <trucks>, from which copies of the
+    trucks can be rebuilt with restore_trucks.
+
+    >>> t = Truck(1, 10, 'Toronto')
+    >>> t.pack(Parcel(7, 4, 'Toronto', 'Guelph'))
+    True
+    >>> copy = restore_trucks(fleet_state([t]))[0]
+    >>> copy is t, copy.route, copy.available_space
+    (False, ['Toronto', 'Guelph'], 6)
+    >>> t = Truck(2, 10, 'Toronto', limits=(5,))
+    >>> t.pack(Parcel(8, 3, 'Toronto', 'Guelph', (2,)))
+    True
+    >>> restore_trucks(fleet_state([t]))[0].available_limits
+    [3]
+    """
+    return [(t.truck_id, t.capacity, t.route[0], t.parcels,
+             isinstance(t.route, Route), t.limits) for t in trucks]
+
+
+def restore_trucks(state: List[TruckState]) -> List[Truck]:
+    """Return new trucks in the given <state>, as returned by fleet_state.
+    """
+    trucks = []
+    for truck_id, capacity, depot, parcels, unique_stops, limits in state:
+        truck = Truck(truck_id, capacity, depot, unique_stops, limits)
+        for parcel in parcels:
+            truck.pack(parcel)
+        trucks.append(truck)
+    return trucks
+
+
+def _share(parcels: List[Parcel], state: List[TruckState],
+           dmap: Optional[DistanceMap]) -> None:
+    """Store the data shared by every run in this process.
+    """
+    _shared['parcels'] = parcels
+    _shared['state'] = state
+    _shared['dmap'] = dmap
+
+
+def _run(strategy: Strategy) -> PortfolioResult:
+    """Schedule the shared parcels onto a copy of the shared trucks with
+    <strategy>, and return the result.
+    """
+    trucks = restore_trucks(_shared['state'])
+    if isinstance(strategy, dict):
+        left = GreedyScheduler(strategy).schedule(_shared['parcels'], trucks)
+    else:
+        left = SeededRandomScheduler(strategy).schedule(_shared['parcels'],
+                                                        trucks)
+
+    fleet = Fleet()
+    for truck in trucks:
+        fleet.add_truck(truck)
+    return PortfolioResult(strategy, [p.parcel_id for p in left], fleet,
+                           _shared['dmap'])
+
+
+def run_portfolio(parcels: List[Parcel], trucks: List[Truck],
+                  dmap: Optional[DistanceMap] = None,
+                  configs: Optional[List[Dict[str, str]]] = None,
+                  random_seeds: Optional[List[int]] = None,
+                  max_workers: Optional[int] = None) -> List[PortfolioResult]:
+    """Schedule <parcels> onto copies of <trucks> with a GreedyScheduler for
+    each configuration in <configs>, and a SeededRandomScheduler for each
+    seed in <random_seeds>, and return the results ranked from best to worst,
+    as described in PortfolioResult.rank_key.
+
+    <configs> defaults to every GreedyScheduler configuration, and
+    <random_seeds> to no seeds.  Runs are spread over a pool of
+    <max_workers> processes, which defaults to the number of CPUs.  If
+    <max_workers> is 1, runs are done in this process instead, and the
+    shared data is released once they are done.
+
+    Neither <parcels> nor <trucks> is mutated.
+
+    >>> ps = [Parcel(1, 5, 'Toronto', 'Hamilton'),
+    ...       Parcel(2, 6, 'Toronto', 'London')]
+    >>> ts = [Truck(1, 6, 'Toronto'), Truck(2, 5, 'Toronto')]
+    >>> results = run_portfolio(ps, ts, random_seeds=[0], max_workers=1)
+    >>> len(results)
+    9
+    >>> results[0].unused_space, results[0].unscheduled
+    (0, [])
+    >>> ts[0].parcels
+    []
+    >>> _shared
+    {}
+    """
+    if configs is None:
+        configs = GREEDY_CONFIGS
+    strategies = list(configs) + list(random_seeds or [])
+    state = fleet_state(trucks)
+
+    if max_workers == 1:
+        _share(parcels, state, dmap)
+        try:
+            results = [_run(strategy) for strategy in strategies]
+        finally:
+            _shared.clear()
+    else:
+        with ProcessPoolExecutor(max_workers, initializer=_share,
+                                 initargs=(parcels, state, dmap)) as pool:
+            results = list(pool.map(_run, strategies))
+
+    results.sort(key=PortfolioResult.rank_key)
+    return results
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'concurrent.futures', 'distance_map',
+                                   'domain', 'scheduler'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
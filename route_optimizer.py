@@ -0,0 +1,300 @@
+"""Assignment 1 - Route optimizer
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module shortens the routes of trucks after they have been scheduled, by
+changing the order in which each truck visits its stops.
+
+A truck only needs to visit each city on its route once, starting and ending
+at its depot.  A route is first built by always driving to the nearest
+unvisited stop, and then improved by reversing parts of it (2-opt) and by
+moving runs of one to three stops elsewhere (Or-opt), until no such change
+makes it shorter or the time budget runs out.  A route is only replaced if
+the new one is shorter.  A route with a leg whose distance is not in the
+distance map is left as it is, since its length is unknown, so such a leg is
+never introduced.
+
+The distances between the stops of a route are looked up once, into a small
+matrix, so the improvement passes do not touch the distance map.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from distance_map import DistanceMap
+from domain import Truck
+
+# The cost of a leg whose distance is not in the distance map.
+MISSING = 10 ** 9
+
+# The distances between the stops of a route, with the depot at index 0.
+CostMatrix = List[List[int]]
+
+
+def _cost_matrix(stops: List[str], dmap: DistanceMap) -> CostMatrix:
+    """Return the distances between each pair of cities in <stops>, with
+    MISSING for each pair whose distance is not in <dmap>.
+    """
+    n = len(stops)
+    origins = [c for c in stops for _ in range(n)]
+    distances = dmap.distances(origins, stops * n)
+    return [[d if d >= 0 else MISSING for d in distances[i * n:(i + 1) * n]]
+            for i in range(n)]
+
+
+def _tour_cost(tour: List[int], cost: CostMatrix) -> int:
+    """Return the cost of visiting the stops in <tour> in order, and
+    returning to the first.
+    """
+    return sum(cost[a][b] for a, b in zip(tour, tour[1:] + tour[:1]))
+
+
+def _nearest_neighbour(cost: CostMatrix) -> List[int]:
+    """Return a tour of every stop, starting at stop 0, that always goes to
+    the nearest stop not yet visited.
+    """
+    unvisited = set(range(1, len(cost)))
+    tour = [0]
+    while unvisited:
+        row = cost[tour[-1]]
+        nearest = min(unvisited, key=lambda j: (row[j], j))
+        unvisited.remove(nearest)
+        tour.append(nearest)
+    return tour
+
+
+def _two_opt(tour: List[int], cost: CostMatrix, deadline: float) -> bool:
+    """Reverse the first section of <tour> whose reversal makes it cheaper.
+    Return True iff such a section was found.  Stop 0 is never moved.
+
+    Distances may differ by direction, so the cost of each section is
+    compared in both directions using prefix sums.
+    """
+    n = len(tour)
+    closed = tour + [0]
+    forward = [0] * n
+    backward = [0] * n
+    for k in range(1, n):
+        forward[k] = forward[k - 1] + cost[closed[k - 1]][closed[k]]
+        backward[k] = backward[k - 1] + cost[closed[k]][closed[k - 1]]
+
+    for i in range(1, n - 1):
+        if time.monotonic() > deadline:
+            return False
+        a = closed[i - 1]
+        for j in range(i + 1, n):
+            b, c, d = closed[i], closed[j], closed[j + 1]
+            # Replace a->b ... c->d by a->c ... b->d, reversing b..c.
+            delta = cost[a][c] + cost[b][d] - cost[a][b] - cost[c][d] \
+                + (backward[j] - backward[i]) - (forward[j] - forward[i])
+            if delta < 0:
+                tour[i:j + 1] = reversed(tour[i:j + 1])
+                return True
+    return False
+
+
+def _or_opt(tour: List[int], cost: CostMatrix, deadline: float) -> bool:
+    """Move the first run of one to three consecutive stops of <tour> whose
+    move elsewhere in <tour> makes it cheaper.  Return True iff such a run was
+    found.  Stop 0 is never moved.
+    """
+    n = len(tour)
+    for length in range(1, 4):
+        for i in range(1, n - length + 1):
+            if time.monotonic() > deadline:
+                return False
+            run = tour[i:i + length]
+            before = tour[i - 1]
+            after = tour[(i + length) % n]
+            removed = cost[before][run[0]] + cost[run[-1]][after] \
+                - cost[before][after]
+            rest = tour[:i] + tour[i + length:]
+            for k in range(len(rest)):
+                p, q = rest[k], rest[(k + 1) % len(rest)]
+                if k == i - 1:
+                    continue
+                added = cost[p][run[0]] + cost[run[-1]][q] - cost[p][q]
+                if added < removed:
+                    tour[:] = rest[:k + 1] + run + rest[k + 1:]
+                    return True
+    return False
+
+
+def _improve(cost: CostMatrix, deadline: float) -> List[int]:
+    """Return a cheap tour of every stop in <cost>, starting at stop 0,
+    improving it until no improvement is found or <deadline> is reached.
+    """
+    tour = _nearest_neighbour(cost)
+    while time.monotonic() <= deadline and \
+            (_two_opt(tour, cost, deadline) or _or_opt(tour, cost, deadline)):
+        pass
+    return tour
+
+
+def optimize_route(route: List[str], dmap: DistanceMap,
+                   deadline: Optional[float] = None) -> List[str]:
+    """Return a route that starts at the depot route[0], visits every city in
+    <route> once, and is no longer than <route> according to <dmap>.
+
+    Improvement stops at <deadline>, a time as returned by
+    time.monotonic(), if it is given.  <route> itself is returned if no
+    shorter route is found, or if a distance it needs is not in <dmap>.
+
+    >>> m = DistanceMap()
+    >>> m.add_distance('Toronto', 'Hamilton', 5)
+    >>> m.add_distance('Toronto', 'London', 9)
+    >>> m.add_distance('Toronto', 'Guelph', 6)
+    >>> m.add_distance('Hamilton', 'London', 4)
+    >>> m.add_distance('Hamilton', 'Guelph', 3)
+    >>> m.add_distance('London', 'Guelph', 7)
+    >>> optimize_route(['Toronto', 'Hamilton', 'London', 'Guelph',
+    ...                 'Hamilton'], m)
+    ['Toronto', 'Guelph', 'Hamilton', 'London']
+    >>> m.add_distance('Toronto', 'Ottawa', 50)
+    >>> optimize_route(['Toronto', 'London', 'Ottawa', 'Hamilton'], m)
+    ['Toronto', 'London', 'Ottawa', 'Hamilton']
+    """
+    stops = list(dict.fromkeys(route))
+    if len(stops) < 3:
+        return route if len(stops) == len(route) else stops
+    cost = _cost_matrix(stops, dmap)
+    ids = {city: i for i, city in enumerate(stops)}
+    old = _tour_cost([ids[c] for c in route], cost)
+    if old >= MISSING:
+        return route
+    tour = _improve(cost, float('inf') if deadline is None else deadline)
+    if _tour_cost(tour, cost) < old:
+        return [stops[i] for i in tour]
+    return route
+
+
+def _improve_task(task: Tuple[CostMatrix, float]) -> Optional[List[int]]:
+    """Return the result of _improve on the cost matrix and deadline in
+    <task>, or None if the deadline has already passed.
+    """
+    cost, deadline = task
+    if time.monotonic() > deadline:
+        return None
+    return _improve(cost, deadline)
+
+
+def optimize_routes(trucks: List[Truck], dmap: DistanceMap,
+                    time_budget: Optional[float] = None,
+                    max_workers: Optional[int] = 1) -> int:
+    """Shorten the route of each truck in <trucks>, as optimize_route does,
+    and return the total distance saved according to <dmap>.
+
+    If <time_budget> is given, routes are optimized for at most that many
+    seconds in total, including the time taken to look up their distances.
+    Trucks that are not reached in time keep their routes.  If <max_workers>
+    is not 1, trucks are optimized in parallel in a pool of <max_workers>
+    processes, or one per CPU if it is None.
+
+    Rolling back a Fleet snapshot relies on the routes it recorded, so raise
+    ValueError, without changing any route, if a truck is in a fleet with an
+    open snapshot.  Commit the snapshot first.
+
+    >>> from domain import Fleet, Parcel
+    >>> m = DistanceMap()
+    >>> m.add_distance('Toronto', 'Hamilton', 5)
+    >>> fleet = Fleet()
+    >>> t = Truck(1, 10, 'Toronto')
+    >>> fleet.add_truck(t)
+    >>> s = fleet.snapshot()
+    >>> t.pack(Parcel(1, 2, 'Toronto', 'Hamilton'))
+    True
+    >>> optimize_routes([t], m)
+    Traceback (most recent call last):
+    ...
+    ValueError: truck 1 is in a fleet with an open snapshot
+    >>> fleet.commit()
+    >>> optimize_routes([t], m)
+    0
+
+    Only the distance that can be computed from <dmap> counts as saved, and a
+    route with a leg that is not in <dmap> is left as it is.
+
+    >>> m.add_distance('Toronto', 'London', 9)
+    >>> m.add_distance('Hamilton', 'London', 4)
+    >>> m.add_distance('Toronto', 'Guelph', 6)
+    >>> m.add_distance('Hamilton', 'Guelph', 3)
+    >>> m.add_distance('London', 'Guelph', 17)
+    >>> t2 = Truck(2, 10, 'Toronto')
+    >>> for i, city in enumerate(['Hamilton', 'London', 'Guelph']):
+    ...     _ = t2.pack(Parcel(i, 1, 'Toronto', city))
+    >>> t3 = Truck(3, 10, 'Toronto')
+    >>> for i, city in enumerate(['Ottawa', 'Hamilton', 'Guelph']):
+    ...     _ = t3.pack(Parcel(i, 1, 'Toronto', city))
+    >>> t2.route_distance(m)
+    32
+    >>> optimize_routes([t2, t3], m)
+    10
+    >>> t2.route, t2.route_distance(m)
+    (['Toronto', 'Guelph', 'Hamilton', 'London'], 22)
+    >>> t3.route
+    ['Toronto', 'Ottawa', 'Hamilton', 'Guelph']
+    """
+    deadline = float('inf') if time_budget is None \
+        else time.monotonic() + time_budget
+    for truck in trucks:
+        if truck.in_snapshot():
+            raise ValueError(f'truck {truck.truck_id} is in a fleet with an '
+                             f'open snapshot')
+    tasks = []
+    for truck in trucks:
+        if time.monotonic() > deadline:
+            break
+        stops = list(dict.fromkeys(truck.route))
+        if len(stops) >= 3 or len(stops) < len(truck.route):
+            cost = _cost_matrix(stops, dmap)
+            ids = {city: i for i, city in enumerate(stops)}
+            old = _tour_cost([ids[c] for c in truck.route], cost)
+            if old < MISSING:
+                tasks.append((truck, stops, cost, old))
+
+    jobs = [(cost, deadline) for _, _, cost, _ in tasks]
+    if max_workers == 1:
+        tours = [_improve_task(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers) as pool:
+            tours = list(pool.map(_improve_task, jobs, chunksize=16))
+
+    saved = 0
+    for (truck, stops, cost, old), tour in zip(tasks, tours):
+        if tour is None:
+            continue
+        new = _tour_cost(tour, cost)
+        if new < old:
+            truck.route = type(truck.route)(stops[i] for i in tour)
+            truck.forget_route_distance()
+            saved += old - new
+    return saved
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing', 'time',
+                                   'concurrent.futures', 'distance_map',
+                                   'domain'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
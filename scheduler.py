@@ -19,54 +19,32 @@ Sophia Huynh, Maryam Majedi, and Jaisie Sin.
 
 This module contains the abstract Scheduler class, as well as the two
 subclasses RandomScheduler and GreedyScheduler, which implement the two
-scheduling algorithms described in the handout.
+scheduling algorithms described in the handout, SeededRandomScheduler, a
+reproducible RandomScheduler, BestFitScheduler, which packs trucks as full as
+possible, and MultiCapacityScheduler, which schedules greedily onto trucks
+with limits in several dimensions.
 """
-from typing import List, Dict, Union
-from random import shuffle, choice
-from container import PriorityQueue
-from domain import Parcel, Truck
-
-
-def _decreasing_volume_parcel(a: Parcel, b: Parcel) -> bool:
-    """
-    Return True if <a> has more volume than <b>.
-    """
-    return a.volume > b.volume
-
-
-def _increasing_volume_parcel(a: Parcel, b: Parcel) -> bool:
-    """
-    Return True if <b> has more volume than <a>.
-    """
-    return a.volume < b.volume
-
-
-def _decreasing_volume_truck(a: Truck, b: Truck) -> bool:
-    """
-    Return True if <a> has more available space than <b>.
-    """
-    return a.available_space > b.available_space
-
-
-def _increasing_volume_truck(a: Truck, b: Truck) -> bool:
-    """
-    Return True if <b> has more available space than <a>.
-    """
-    return a.available_space < b.available_space
-
-
-def _comes_before(a: Parcel, b: Parcel) -> bool:
-    """
-    Return True if <a>'s destination comes before <b> alphabetically.
-    """
-    return a.end < b.end
-
-
-def _comes_after(a: Parcel, b: Parcel) -> bool:
-    """
-    Return True if <a>'s destination comes after <b> alphabetically.
-    """
-    return a.end > b.end
+from bisect import bisect_left, insort
+from typing import Any, Callable, List, Dict, Iterable, Optional, Set, Tuple, \
+    Union
+from random import Random, shuffle, choice
+from operator import attrgetter
+from time import perf_counter
+from domain import Parcel, ParcelTable, Truck
+
+# The configurations supported by GreedyScheduler.
+GREEDY_CONFIGS = [
+    {'parcel_priority': priority, 'parcel_order': parcel_order,
+     'truck_order': truck_order}
+    for priority in ['volume', 'destination']
+    for parcel_order in ['non-decreasing', 'non-increasing']
+    for truck_order in ['non-decreasing', 'non-increasing']
+]
+
+# Key functions used to order parcels.  Sorting by key is stable, so parcels
+# with equal keys keep the order in which they were given.
+_parcel_volume = attrgetter('volume')
+_parcel_destination = attrgetter('end')
 
 
 class Scheduler:
@@ -98,6 +76,144 @@ class Scheduler:
         """
         raise NotImplementedError
 
+    def schedule_table(self, table: ParcelTable,
+                       trucks: List[Truck]) -> List[int]:
+        """Schedule the parcels in <table> onto the given <trucks>, as
+        Scheduler.schedule does for a list of parcels.
+
+        Return a list containing the rows of <table> whose parcels did not
+        get scheduled onto any truck, in the order that schedule returns them.
+
+        This creates a Parcel for every row of <table>.  Child classes may
+        override it to work on the columns of <table> directly.
+        """
+        parcels = [table.parcel(row) for row in range(len(table))]
+        rows = {id(p): row for row, p in enumerate(parcels)}
+        return [rows[id(p)] for p in self.schedule(parcels, trucks)]
+
+
+class SchedulerStats:
+    """Counters and timings collected while a scheduler runs, for finding
+    where its time goes.
+
+    Pass a SchedulerStats as the <verbose> argument of
+    GreedyScheduler.schedule to collect them.  The scheduler checks once per
+    parcel whether stats are being collected, and does no other work for
+    them otherwise.
+
+    === Public Attributes ===
+    parcels_processed: The number of parcels considered so far.
+    parcels_packed: The number of parcels packed into a truck so far.
+    destination_hits: The number of parcels packed into a truck whose route
+    ended at the parcel's destination.
+    fallbacks: The number of parcels packed into a truck chosen from all
+    eligible trucks, because no eligible truck's route ended at the parcel's
+    destination.
+    index_searches: The number of binary searches of the truck index.  The
+    index replaces scanning every truck for every parcel, so this counts the
+    truck lookups done.
+    phase_seconds: The wall time spent in each phase of scheduling, in
+    seconds: ordering the parcels, building the truck index, and choosing
+    trucks for and packing the parcels.
+    callback: A function called with these stats every <every> parcels, and
+    once more when scheduling finishes unless it was just called, or None.
+    every: The number of parcels between calls to <callback>.
+
+    === Sample Usage ===
+    >>> config = {'parcel_priority': 'volume',
+    ...           'parcel_order': 'non-increasing',
+    ...           'truck_order': 'non-decreasing'}
+    >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 12, 'Toronto')]
+    >>> parcels = [Parcel(1, 6, 'Toronto', 'Guelph'),
+    ...            Parcel(2, 3, 'Toronto', 'London'),
+    ...            Parcel(3, 4, 'Toronto', 'Guelph'),
+    ...            Parcel(4, 9, 'Toronto', 'Ottawa')]
+    >>> stats = SchedulerStats()
+    >>> len(GreedyScheduler(config).schedule(parcels, trucks, stats))
+    1
+    >>> stats.parcels_processed, stats.destination_hits, stats.fallbacks
+    (4, 1, 2)
+    >>> sorted(stats.phase_seconds)
+    ['index', 'order', 'schedule']
+    >>> calls = []
+    >>> stats = SchedulerStats(lambda s: calls.append(s.parcels_processed), 2)
+    >>> _ = GreedyScheduler(config).schedule(parcels, trucks, stats)
+    >>> calls
+    [2, 4]
+    """
+    parcels_processed: int
+    parcels_packed: int
+    destination_hits: int
+    fallbacks: int
+    index_searches: int
+    phase_seconds: Dict[str, float]
+    callback: Optional[Callable[['SchedulerStats'], None]]
+    every: int
+
+    def __init__(self,
+                 callback: Optional[Callable[['SchedulerStats'], None]] = None,
+                 every: int = 10000) -> None:
+        """Initialize these stats with every counter at zero, calling
+        <callback>, if given, every <every> parcels.
+
+        Precondition: every > 0
+        """
+        self.parcels_processed = 0
+        self.parcels_packed = 0
+        self.destination_hits = 0
+        self.fallbacks = 0
+        self.index_searches = 0
+        self.phase_seconds = {}
+        self.callback = callback
+        self.every = every
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Record that <seconds> more were spent in <phase>.
+        """
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + \
+            seconds
+
+    def parcel_done(self, packed: bool) -> None:
+        """Record that a parcel was considered, and packed if <packed> is
+        True, and call the callback if it is due.
+        """
+        self.parcels_processed += 1
+        if packed:
+            self.parcels_packed += 1
+        if self.callback is not None and \
+                self.parcels_processed % self.every == 0:
+            self.callback(self)
+
+    def finish(self) -> None:
+        """Record that scheduling has finished, and call the callback
+        unless it was just called for the last parcel.
+        """
+        if self.callback is not None and \
+                (self.parcels_processed == 0 or
+                 self.parcels_processed % self.every != 0):
+            self.callback(self)
+
+    def __str__(self) -> str:
+        """Return a summary of these stats.
+
+        >>> stats = SchedulerStats()
+        >>> stats.parcel_done(True)
+        >>> stats.add_time('schedule', 0.25)
+        >>> print(stats)
+        parcels: 1 processed, 1 packed (0 destination hits, 0 fallbacks)
+        index searches: 0 (0.00 per parcel)
+        schedule: 0.250000s
+        """
+        per_parcel = self.index_searches / max(1, self.parcels_processed)
+        lines = [f'parcels: {self.parcels_processed} processed, '
+                 f'{self.parcels_packed} packed ({self.destination_hits} '
+                 f'destination hits, {self.fallbacks} fallbacks)',
+                 f'index searches: {self.index_searches} '
+                 f'({per_parcel:.2f} per parcel)']
+        for phase, seconds in self.phase_seconds.items():
+            lines.append(f'{phase}: {seconds:.6f}s')
+        return '\n'.join(lines)
+
 
 class RandomScheduler(Scheduler):
     """A random scheduler that packs parcels onto trucks randomly.
@@ -110,11 +226,12 @@ class RandomScheduler(Scheduler):
         Return a list containing the parcels that could not be scheduled.
         """
         not_scheduled_parcels = []
+        parcels = list(parcels)
         shuffle(parcels)
         for parcel in parcels:
             trucks_available = []
             for truck in trucks:
-                if parcel.volume <= truck.available_space:
+                if truck.fits(parcel):
                     trucks_available.append(truck)
             shuffle(trucks_available)
             if not trucks_available:
@@ -125,6 +242,84 @@ class RandomScheduler(Scheduler):
         return not_scheduled_parcels
 
 
+class SeededRandomScheduler(Scheduler):
+    """A scheduler that packs parcels onto trucks randomly, like
+    RandomScheduler, using its own seeded random number generator so that
+    its schedules can be reproduced.
+
+    Parcels are considered in a random order, and each is packed into a
+    truck chosen uniformly at random among the trucks it fits in.  The
+    trucks are kept sorted by available space, so the trucks with enough
+    space for a parcel are found by one binary search rather than a scan of
+    every truck.
+
+    === Private Attributes ===
+    _rng: The random number generator used to make every random choice.
+
+    === Sample Usage ===
+    >>> parcels = [Parcel(i, 4, 'Toronto', 'Guelph') for i in range(1, 6)]
+    >>> def schedule(seed):
+    ...     trucks = [Truck(1, 10, 'Toronto'), Truck(2, 10, 'Toronto')]
+    ...     left = SeededRandomScheduler(seed).schedule(parcels, trucks)
+    ...     return [p.parcel_id for p in left], [t.packed_p for t in trucks]
+    >>> schedule(7) == schedule(7)
+    True
+    >>> len(schedule(7)[0])
+    1
+    >>> [p.parcel_id for p in parcels]
+    [1, 2, 3, 4, 5]
+    """
+    _rng: Random
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        """Initialize this scheduler with a random number generator seeded
+        with <seed>, or from the operating system if <seed> is None.
+        """
+        self._rng = Random(seed)
+
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the parcels in <parcels> onto trucks in <trucks> randomly,
+        considering only trucks that each parcel fits in.
+
+        Return a list containing the parcels that could not be scheduled.
+        """
+        not_scheduled = []
+        order = list(parcels)
+        self._rng.shuffle(order)
+        index = _TruckIndex(trucks)
+        for box in order:
+            i = index.random_fit(box, self._rng)
+            if i == -1 or not index.pack(i, box):
+                not_scheduled.append(box)
+        return not_scheduled
+
+    def replicas(self, parcels: List[Parcel], trucks: List[Truck],
+                 count: int) -> List[Tuple[List[Parcel], List[Truck]]]:
+        """Schedule <parcels> onto <count> separate copies of <trucks>, each
+        with a different random schedule, and return the parcels left over
+        and the trucks of each copy.
+
+        Neither <parcels> nor <trucks> is mutated.  The replicas depend only
+        on this scheduler's seed, so a batch can be reproduced.
+
+        >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 6, 'Toronto')]
+        >>> parcels = [Parcel(1, 6, 'Toronto', 'Guelph'),
+        ...            Parcel(2, 5, 'Toronto', 'London'),
+        ...            Parcel(3, 5, 'Toronto', 'Ottawa')]
+        >>> runs = SeededRandomScheduler(3).replicas(parcels, trucks, 50)
+        >>> sorted({len(left) for left, _ in runs})
+        [0, 1]
+        >>> trucks[0].parcels
+        []
+        """
+        runs = []
+        for _ in range(count):
+            copies = [truck.copy() for truck in trucks]
+            runs.append((self.schedule(parcels, copies), copies))
+        return runs
+
+
 class GreedyScheduler(Scheduler):
     """A scheduler that packs parcels into trucks strategically, depending on
     given parcel priority, parcel order and truck order.
@@ -154,11 +349,20 @@ class GreedyScheduler(Scheduler):
     priority.
     _truck_order: The order in which trucks will be considered by their
     available spaces.
+    _parcel_key: The key by which parcels are ordered, as given by the parcel
+    priority.
+    _reverse_parcels: Whether parcels are considered from the largest key to
+    the smallest.
+    _largest_truck: Whether the truck with the most available space is chosen,
+    rather than the one with the least.
 
     """
     _parcel_priority: str
     _parcel_order: str
     _truck_order: str
+    _parcel_key: Callable[[Parcel], Any]
+    _reverse_parcels: bool
+    _largest_truck: bool
 
     def __init__(self, config: Dict[str, Union[str, bool]]) -> None:
 
@@ -166,377 +370,767 @@ class GreedyScheduler(Scheduler):
         self._parcel_order = config['parcel_order']
         self._truck_order = config['truck_order']
 
+        if self._parcel_priority == 'volume':
+            self._parcel_key = _parcel_volume
+        else:
+            self._parcel_key = _parcel_destination
+        self._reverse_parcels = self._parcel_order != 'non-decreasing'
+        self._largest_truck = self._truck_order != 'non-decreasing'
+
     def schedule(self, parcels: List[Parcel], trucks: List[Truck],
-                 verbose: bool = False) -> List[Parcel]:
+                 verbose: Union[bool, SchedulerStats] = False) \
+            -> List[Parcel]:
         """Schedule the parcels in <parcels> onto trucks in <trucks> with
         respect to the scheduler's parcel priority, parcel order and truck
         order.
 
         Return a list containing the parcels that could not be scheduled.
-        """
 
-        if self._parcel_priority == 'volume':
-            if self._parcel_order == 'non-decreasing':
-                if self._truck_order == 'non-decreasing':
-                    func = _inc_inc
-                else:
-                    func = _inc_dec
-            else:
-                if self._truck_order == 'non-decreasing':
-                    func = _dec_inc
-                else:
-                    func = _dec_dec
+        If <verbose> is a SchedulerStats, counters and timings are added to
+        it as scheduling runs.  If it is True, they are printed at the end.
+
+        A parcel is only packed into a truck that it fits in every limit:
+
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-decreasing'}
+        >>> t1 = Truck(1, 5, 'Toronto', limits=(1,))
+        >>> t2 = Truck(2, 10, 'Toronto', limits=(100,))
+        >>> p = Parcel(1, 3, 'Toronto', 'Guelph', (50,))
+        >>> GreedyScheduler(config).schedule([p], [t1, t2])
+        []
+        >>> t1.packed_p, t2.packed_p
+        ([], [1])
+        """
+        stats = None
+        if isinstance(verbose, SchedulerStats):
+            stats = verbose
+        elif verbose:
+            stats = SchedulerStats()
+        not_scheduled = _greedy_schedule(parcels, trucks, self._parcel_key,
+                                         self._reverse_parcels,
+                                         self._largest_truck, stats)
+        if verbose is True:
+            print(stats)
+        return not_scheduled
+
+    def schedule_table(self, table: ParcelTable,
+                       trucks: List[Truck]) -> List[int]:
+        """Schedule the parcels in <table> onto trucks in <trucks>, exactly as
+        schedule would for the same parcels.
+
+        Return a list containing the rows of <table> whose parcels could not
+        be scheduled.
+
+        Parcels are ordered and matched to trucks using the columns of
+        <table>.  A Parcel object is only created for a row when it is packed
+        into a truck, since trucks hold the parcels packed into them.
+
+        >>> table = ParcelTable()
+        >>> table.add(1, 5, 'Toronto', 'Hamilton')
+        >>> table.add(2, 30, 'Toronto', 'London')
+        >>> table.add(3, 4, 'Toronto', 'Hamilton')
+        >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 12, 'Toronto')]
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-increasing'}
+        >>> GreedyScheduler(config).schedule_table(table, trucks)
+        [1]
+        >>> trucks[1].packed_p
+        [1, 3]
+        """
+        if self._parcel_key is _parcel_volume:
+            keys = table.volumes
         else:
-            if self._parcel_order == 'non-decreasing':
-                if self._truck_order == 'non-decreasing':
-                    func = _incdest_inc
-                else:
-                    func = _incdest_dec
-            else:
-                if self._truck_order == 'non-decreasing':
-                    func = _decdest_inc
-                else:
-                    func = _decdest_dec
-
-        return func(parcels, trucks)
+            # Order city ids alphabetically by name.
+            ranks = [0] * len(table.cities)
+            for rank, city in enumerate(sorted(range(len(table.cities)),
+                                               key=table.cities.__getitem__)):
+                ranks[city] = rank
+            keys = [ranks[city] for city in table.ends]
+
+        not_scheduled = []
+        index = _TruckIndex(trucks)
+        select = index.select
+        volumes = table.volumes
+        ends = table.ends
+        cities = table.cities
+
+        for row in sorted(range(len(table)), key=keys.__getitem__,
+                          reverse=self._reverse_parcels):
+            i = select(volumes[row], cities[ends[row]], self._largest_truck)
+            box = table.parcel(row) if i != -1 else None
+            if row in table.dimensions and i != -1 and \
+                    not trucks[i].fits(box):
+                i = index.select_fitting(box, box.end, self._largest_truck)
+            if i == -1 or not index.pack(i, box):
+                not_scheduled.append(row)
+
+        return not_scheduled
+
+    def start(self, trucks: List[Truck]) -> 'GreedySession':
+        """Return a new session that schedules parcels onto <trucks> as they
+        arrive, with respect to this scheduler's parcel priority, parcel
+        order and truck order.
+
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-decreasing'}
+        >>> session = GreedyScheduler(config).start([Truck(1, 10, 'Toronto')])
+        >>> session.assign(Parcel(1, 6, 'Toronto', 'Hamilton')).truck_id
+        1
+        >>> print(session.assign(Parcel(2, 6, 'Toronto', 'London')))
+        None
+        """
+        return GreedySession(trucks, self._parcel_key, self._reverse_parcels,
+                             self._largest_truck)
 
-# ----- Helper functions -----
 
+class BestFitScheduler(Scheduler):
+    """A scheduler that packs parcels into trucks using best-fit decreasing
+    bin packing.
 
-def _inc_inc(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    Parcels are considered from the largest volume to the smallest, and each
+    parcel is packed into the truck with the least available space that is
+    still enough for it.  Destinations are not considered.
 
-    parcel priority: non-decreasing volume
-    truck priority: non-decreasing available space
+    Ties are broken using the order in which the parcels and trucks are
+    given.
     """
-    not_scheduled = []
-
-    p = PriorityQueue(_increasing_volume_parcel)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
 
-    return not_scheduled
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the parcels in <parcels> onto trucks in <trucks> by best
+        fit, largest parcel first.
 
+        Return a list containing the parcels that could not be scheduled.
 
-def _inc_dec(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+        >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 7, 'Toronto'),
+        ...           Truck(3, 9, 'Toronto')]
+        >>> parcels = [Parcel(1, 2, 'Toronto', 'Guelph'),
+        ...            Parcel(2, 6, 'Toronto', 'London'),
+        ...            Parcel(3, 8, 'Toronto', 'Ottawa'),
+        ...            Parcel(4, 9, 'Toronto', 'Hamilton')]
+        >>> BestFitScheduler().schedule(parcels, trucks)
+        []
+        >>> [t.packed_p for t in trucks]
+        [[3, 1], [2], [4]]
+
+        A parcel over the limits of the best fitting truck goes to the best
+        fitting truck that it fits in every dimension:
+
+        >>> t1 = Truck(1, 5, 'Toronto', limits=(1,))
+        >>> t2 = Truck(2, 10, 'Toronto', limits=(100,))
+        >>> p = Parcel(1, 3, 'Toronto', 'Guelph', (50,))
+        >>> BestFitScheduler().schedule([p], [t1, t2])
+        []
+        >>> t1.packed_p, t2.packed_p
+        ([], [1])
+        """
+        not_scheduled = []
+        index = _TruckIndex(trucks)
+        best_fit = index.best_fit
 
-    parcel priority: non-decreasing volume
-    truck priority: non-increasing available space
-    """
-    not_scheduled = []
+        for box in sorted(parcels, key=_parcel_volume, reverse=True):
+            i = best_fit(box.volume)
+            if box.dimensions and i != -1 and not trucks[i].fits(box):
+                i = index.select_fitting(box, None, False)
+            if i == -1 or not index.pack(i, box):
+                not_scheduled.append(box)
 
-    p = PriorityQueue(_increasing_volume_parcel)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
+        return not_scheduled
 
-    return not_scheduled
 
+class MultiCapacityScheduler(Scheduler):
+    """A greedy scheduler for trucks with limits in several dimensions, such
+    as weight and pallet slots as well as volume.
 
-def _dec_inc(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    Parcels are considered, and trucks chosen, exactly as GreedyScheduler
+    does with the same configuration, except that a truck is only eligible
+    for a parcel if the parcel fits in every dimension.  GreedyScheduler
+    itself only checks volume.
 
-    parcel priority: non-increasing volume
-    truck priority: non-decreasing available space
+    === Private Attributes ===
+    _parcel_key: The key by which parcels are ordered, as given by the parcel
+    priority.
+    _reverse_parcels: Whether parcels are considered from the largest key to
+    the smallest.
+    _largest_truck: Whether the truck with the most available space is chosen,
+    rather than the one with the least.
     """
-    not_scheduled = []
+    _parcel_key: Callable[[Parcel], Any]
+    _reverse_parcels: bool
+    _largest_truck: bool
 
-    p = PriorityQueue(_decreasing_volume_parcel)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
+    def __init__(self, config: Dict[str, Union[str, bool]]) -> None:
+        """Initialize this scheduler with a GreedyScheduler <config>.
+        """
+        if config['parcel_priority'] == 'volume':
+            self._parcel_key = _parcel_volume
         else:
-            not_scheduled.append(box)
+            self._parcel_key = _parcel_destination
+        self._reverse_parcels = config['parcel_order'] != 'non-decreasing'
+        self._largest_truck = config['truck_order'] != 'non-decreasing'
 
-    return not_scheduled
+    def schedule(self, parcels: List[Parcel], trucks: List[Truck],
+                 verbose: bool = False) -> List[Parcel]:
+        """Schedule the parcels in <parcels> onto trucks in <trucks> with
+        respect to the scheduler's configuration, checking every dimension.
 
+        Return a list containing the parcels that could not be scheduled.
 
-def _dec_dec(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """
-    A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-increasing'}
+        >>> trucks = [Truck(1, 20, 'Toronto', limits=(100,)),
+        ...           Truck(2, 10, 'Toronto', limits=(500,))]
+        >>> parcels = [Parcel(1, 8, 'Toronto', 'Guelph', (300,)),
+        ...            Parcel(2, 5, 'Toronto', 'London', (90,)),
+        ...            Parcel(3, 4, 'Toronto', 'Ottawa', (250,))]
+        >>> [p.parcel_id for p in
+        ...  MultiCapacityScheduler(config).schedule(parcels, trucks)]
+        [3]
+        >>> [t.packed_p for t in trucks]
+        [[2], [1]]
+        """
+        not_scheduled = []
+        index = _CapacityIndex(trucks)
+        select = index.select
+        largest = self._largest_truck
 
-    parcel priority: non-increasing volume
-    truck priority: non-increasing available space
-    """
-    not_scheduled = []
+        for box in sorted(parcels, key=self._parcel_key,
+                          reverse=self._reverse_parcels):
+            i = select(box, largest)
+            if i == -1 or not index.pack(i, box):
+                not_scheduled.append(box)
 
-    p = PriorityQueue(_decreasing_volume_parcel)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
+        return not_scheduled
 
-    return not_scheduled
 
+class GreedySession:
+    """An ongoing greedy schedule onto a fixed list of trucks, to which
+    parcels are added as they arrive, one at a time or in small batches.
+
+    Each parcel is packed as GreedyScheduler would pack it if it were the
+    next parcel considered, and parcels in a batch are considered in the
+    scheduler's parcel order.  The truck index is kept between calls, so
+    assigning a parcel takes one O(log T) binary search to choose a truck,
+    plus an O(T) list insertion and deletion to update the index, where T
+    is the number of trucks.  The list updates only move memory, and are
+    much cheaper than the scan of every truck they replace.
 
-def _incdest_inc(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    While a session is in use, its trucks must only be packed through the
+    session.
 
-    parcel priority: non-decreasing destination
-    truck priority: non-decreasing available space
+    === Private Attributes ===
+    _index: The index over the trucks of this session.
+    _trucks: The trucks of this session.
+    _parcel_key: The key by which parcels in a batch are ordered.
+    _reverse_parcels: Whether parcels in a batch are considered from the
+    largest key to the smallest.
+    _largest_truck: Whether the truck with the most available space is chosen,
+    rather than the one with the least.
     """
-    not_scheduled = []
+    _index: '_TruckIndex'
+    _trucks: List[Truck]
+    _parcel_key: Callable[[Parcel], Any]
+    _reverse_parcels: bool
+    _largest_truck: bool
+
+    def __init__(self, trucks: List[Truck],
+                 parcel_key: Callable[[Parcel], Any], reverse_parcels: bool,
+                 largest_truck: bool) -> None:
+        """Initialize this session onto <trucks>, ordering batches of parcels
+        by <parcel_key>, reversed if <reverse_parcels> is True, and choosing
+        the truck with the most available space if <largest_truck> is True.
+        """
+        self._index = _TruckIndex(trucks)
+        self._trucks = trucks
+        self._parcel_key = parcel_key
+        self._reverse_parcels = reverse_parcels
+        self._largest_truck = largest_truck
+
+    def assign(self, parcel: Parcel) -> Optional[Truck]:
+        """Pack <parcel> into a truck, and return that truck, or return None
+        if <parcel> fits in no truck, in volume and in every limit.
+        """
+        i = self._index.select(parcel.volume, parcel.end, self._largest_truck)
+        if parcel.dimensions and i != -1 and \
+                not self._trucks[i].fits(parcel):
+            i = self._index.select_fitting(parcel, parcel.end,
+                                           self._largest_truck)
+        if i == -1 or not self._index.pack(i, parcel):
+            return None
+        return self._trucks[i]
+
+    def assign_batch(self, parcels: List[Parcel]) \
+            -> Tuple[List[Tuple[Parcel, Truck]], List[Parcel]]:
+        """Pack the parcels in <parcels> into trucks, in the scheduler's
+        parcel order.
+
+        Return a list of (parcel, truck) pairs for the parcels that were
+        packed, in the order they were packed, and a list of the parcels that
+        could not be packed.
+
+        >>> config = {'parcel_priority': 'volume',
+        ...           'parcel_order': 'non-increasing',
+        ...           'truck_order': 'non-decreasing'}
+        >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 4, 'Toronto')]
+        >>> session = GreedyScheduler(config).start(trucks)
+        >>> packed, left = session.assign_batch(
+        ...     [Parcel(1, 3, 'Toronto', 'Guelph'),
+        ...      Parcel(2, 9, 'Toronto', 'London'),
+        ...      Parcel(3, 4, 'Toronto', 'Ottawa')])
+        >>> [(p.parcel_id, t.truck_id) for p, t in packed]
+        [(2, 1), (3, 2)]
+        >>> [p.parcel_id for p in left]
+        [1]
+        """
+        packed = []
+        not_scheduled = []
+        for parcel in sorted(parcels, key=self._parcel_key,
+                             reverse=self._reverse_parcels):
+            truck = self.assign(parcel)
+            if truck is None:
+                not_scheduled.append(parcel)
+            else:
+                packed.append((parcel, truck))
+        return packed, not_scheduled
 
-    p = PriorityQueue(_comes_before)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
 
-    return not_scheduled
+class _TruckIndex:
+    """An index over a list of trucks, used to choose a truck for each parcel
+    without scanning every truck.
 
+    Each truck is identified by its position in the list of trucks, and is
+    recorded as an (available space, position) pair.  Because the pairs are
+    kept sorted, the trucks with enough space for a parcel form a suffix of
+    each list, which is found by an O(log T) binary search, where T is the
+    number of trucks.  Packing a truck moves its pair within these lists by
+    deleting and inserting it, which is O(T), although it only moves memory.
 
-def _incdest_dec(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    Trucks in the index must only be packed through _TruckIndex.pack, so that
+    the index stays up to date.
 
-    parcel priority: non-decreasing destination
-    truck priority: non-increasing available space
+    === Private Attributes ===
+    _trucks: The indexed trucks.
+    _by_space: An (available space, position) pair for every truck, in
+    sorted order.
+    _by_tail: Maps each city to the sorted (available space, position) pairs
+    of the trucks whose route currently ends at that city.
     """
-    not_scheduled = []
+    _trucks: List[Truck]
+    _by_space: List[Tuple[int, int]]
+    _by_tail: Dict[str, List[Tuple[int, int]]]
 
-    p = PriorityQueue(_comes_before)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
+    def __init__(self, trucks: List[Truck]) -> None:
+        """Initialize this index over <trucks>.
+        """
+        self._trucks = trucks
+        self._by_space = []
+        self._by_tail = {}
+        for i, truck in enumerate(trucks):
+            entry = (truck.available_space, i)
+            self._by_space.append(entry)
+            self._by_tail.setdefault(truck.route[-1], []).append(entry)
+        self._by_space.sort()
+        for entries in self._by_tail.values():
+            entries.sort()
+
+    def select(self, volume: int, destination: str, largest: bool) -> int:
+        """Return the position of the truck that a parcel with <volume> and
+        <destination> should be packed into, or -1 if no truck has enough
+        available space.
+
+        Trucks whose route ends at <destination> are preferred.  Among the
+        preferred trucks, or among all trucks if none is preferred, the one
+        with the most available space is chosen if <largest> is True, and
+        the one with the least sufficient available space otherwise.  Ties
+        are broken by position.
+
+        >>> trucks = [Truck(1, 10, 'Toronto'), Truck(2, 20, 'Toronto'),
+        ...           Truck(3, 20, 'Toronto')]
+        >>> index = _TruckIndex(trucks)
+        >>> index.select(5, 'Hamilton', True)
+        1
+        >>> index.pack(0, Parcel(1, 2, 'Toronto', 'Hamilton'))
+        True
+        >>> index.select(5, 'Hamilton', True)
+        0
+        >>> index.select(9, 'Hamilton', False)
+        1
+        >>> index.select(25, 'Hamilton', False)
+        -1
+        """
+        if destination in self._by_tail:
+            i = _pick(self._by_tail[destination], volume, largest)
+            if i != -1:
+                return i
+        return _pick(self._by_space, volume, largest)
+
+    def record(self, i: int, parcel: Parcel, stats: SchedulerStats) -> None:
+        """Record in <stats> that select chose position <i> for <parcel>:
+        the index searches it did, whether the truck's route ends at the
+        parcel's destination, and whether the parcel will be packed.
+
+        This must be called after select and before pack, so that the truck
+        is still as select saw it.
+        """
+        # select only falls back to all trucks if no truck with enough space
+        # ends at the destination, so the chosen truck ends there iff it was
+        # found without falling back.
+        hit = i != -1 and self._trucks[i].route[-1] == parcel.end
+        stats.index_searches += (parcel.end in self._by_tail) + (not hit)
+        if hit:
+            stats.destination_hits += 1
+        elif i != -1:
+            stats.fallbacks += 1
+        stats.parcel_done(i != -1 and self._trucks[i].fits(parcel))
+
+    def random_fit(self, parcel: Parcel, rng: Random) -> int:
+        """Return the position of a truck chosen uniformly at random, using
+        <rng>, among the trucks that <parcel> fits in, or -1 if it fits in no
+        truck.
+
+        >>> index = _TruckIndex([Truck(1, 10, 'Toronto'),
+        ...                      Truck(2, 6, 'Toronto')])
+        >>> index.random_fit(Parcel(1, 8, 'Toronto', 'Guelph'), Random(0))
+        0
+        >>> index.random_fit(Parcel(2, 11, 'Toronto', 'Guelph'), Random(0))
+        -1
+        """
+        entries = self._by_space
+        j = bisect_left(entries, (parcel.volume, -1))
+        if j == len(entries):
+            return -1
+        i = entries[rng.randrange(j, len(entries))][1]
+        if parcel.dimensions and not self._trucks[i].fits(parcel):
+            # The trucks with enough space may not all have enough capacity
+            # in every other dimension; choose among those that do.
+            fitting = [i for _, i in entries[j:]
+                       if self._trucks[i].fits(parcel)]
+            if not fitting:
+                return -1
+            i = rng.choice(fitting)
+        return i
+
+    def best_fit(self, volume: int) -> int:
+        """Return the position of the truck with the least available space
+        that is at least <volume>, or -1 if no truck has enough available
+        space.  Ties are broken by position.
+
+        >>> index = _TruckIndex([Truck(1, 10, 'Toronto'),
+        ...                      Truck(2, 6, 'Toronto')])
+        >>> index.best_fit(5), index.best_fit(7), index.best_fit(11)
+        (1, 0, -1)
+        """
+        return _pick(self._by_space, volume, False)
+
+    def select_fitting(self, parcel: Parcel, destination: Optional[str],
+                       largest: bool) -> int:
+        """Return the position of the truck that select would choose for
+        <parcel> with <destination> and <largest>, considering only the
+        trucks that <parcel> fits in, in every dimension.  If <destination>
+        is None, trucks are not preferred by destination, as in best_fit.
+        Return -1 if <parcel> fits in no truck.
+
+        This checks every truck with enough available space, so it is only
+        meant for a parcel that is over the limits of the truck chosen for
+        it by volume.
+
+        >>> trucks = [Truck(1, 5, 'Toronto', limits=(1,)),
+        ...           Truck(2, 10, 'Toronto', limits=(100,))]
+        >>> index = _TruckIndex(trucks)
+        >>> p = Parcel(1, 3, 'Toronto', 'Guelph', (50,))
+        >>> index.best_fit(p.volume), index.select_fitting(p, None, False)
+        (0, 1)
+        """
+        trucks = self._trucks
+        if destination in self._by_tail:
+            fitting = [entry for entry in self._by_tail[destination]
+                       if trucks[entry[1]].fits(parcel)]
+            i = _pick(fitting, parcel.volume, largest)
+            if i != -1:
+                return i
+        fitting = [entry for entry in self._by_space
+                   if trucks[entry[1]].fits(parcel)]
+        return _pick(fitting, parcel.volume, largest)
+
+    def pack(self, i: int, parcel: Parcel) -> bool:
+        """Pack <parcel> into the truck at position <i>, update this index,
+        and return whether <parcel> was packed.  It is not packed if it is
+        over one of the truck's limits, since this index only looks at volume.
+
+        Precondition: the truck has enough available space for <parcel>.
+
+        >>> index = _TruckIndex([Truck(1, 10, 'Toronto', limits=(5,))])
+        >>> index.pack(0, Parcel(1, 3, 'Toronto', 'Guelph', (9,)))
+        False
+        >>> index.select(10, 'Toronto', True)
+        0
+        """
+        truck = self._trucks[i]
+        old_entry = (truck.available_space, i)
+        old_city = truck.route[-1]
+        old_tail = self._by_tail[old_city]
+        if not truck.pack(parcel):
+            return False
+        new_entry = (truck.available_space, i)
+
+        del self._by_space[bisect_left(self._by_space, old_entry)]
+        insort(self._by_space, new_entry)
+        del old_tail[bisect_left(old_tail, old_entry)]
+        if not old_tail:
+            del self._by_tail[old_city]
+        insort(self._by_tail.setdefault(truck.route[-1], []), new_entry)
+        return True
+
+
+def _pick(entries: List[Tuple[int, int]], volume: int, largest: bool) -> int:
+    """Return the position recorded in the entry of <entries> with the most
+    available space if <largest> is True, or with the least available space
+    that is at least <volume> otherwise.  Ties are broken by position.
+
+    Return -1 if no entry has at least <volume> available space.
+
+    Precondition: <entries> is a sorted list of (available space, position)
+    pairs.
+
+    >>> _pick([(3, 2), (7, 0), (7, 1)], 4, True)
+    0
+    >>> _pick([(3, 2), (7, 0), (7, 1)], 3, False)
+    2
+    >>> _pick([(3, 2), (7, 0), (7, 1)], 8, False)
+    -1
+    """
+    if largest:
+        if not entries or entries[-1][0] < volume:
+            return -1
+        return entries[bisect_left(entries, (entries[-1][0], -1))][1]
+    j = bisect_left(entries, (volume, -1))
+    if j == len(entries):
+        return -1
+    return entries[j][1]
+
+
+class _CapacityIndex:
+    """An index of trucks by the capacity left in each of their dimensions,
+    used to find the trucks that a parcel fits in without checking every
+    dimension of every truck.
+
+    Dimension 0 is volume, and dimension k > 0 is the truck's limit k - 1.
+    As in _TruckIndex, each dimension has a sorted list of (capacity left,
+    position) pairs, so the trucks with enough capacity in that dimension
+    form a suffix of the list.  A parcel is only checked against the trucks
+    in the shortest such suffix, so adding dimensions does not add to the
+    number of trucks checked.
+
+    Trucks in the index must only be packed through _CapacityIndex.pack, so
+    that the index stays up to date.
 
-    return not_scheduled
+    === Private Attributes ===
+    _trucks: The indexed trucks.
+    _left: The capacity left in each dimension of each truck, by position.
+    A truck with no limit in a dimension has infinite capacity left in it.
+    _by_dim: A sorted list of (capacity left, position) pairs for each
+    dimension.
+    _by_tail: Maps each city to the positions of the trucks whose route
+    currently ends at that city.
+    """
+    _trucks: List[Truck]
+    _left: List[List[float]]
+    _by_dim: List[List[Tuple[float, int]]]
+    _by_tail: Dict[str, Set[int]]
 
+    def __init__(self, trucks: List[Truck]) -> None:
+        """Initialize this index over <trucks>.
+        """
+        self._trucks = trucks
+        dims = 1 + max((len(t.limits) for t in trucks), default=0)
+        self._left = []
+        self._by_dim = [[] for _ in range(dims)]
+        self._by_tail = {}
+        for i, truck in enumerate(trucks):
+            left = self._capacity_left(truck)
+            self._left.append(left)
+            for k in range(dims):
+                self._by_dim[k].append((left[k], i))
+            self._by_tail.setdefault(truck.route[-1], set()).add(i)
+        for entries in self._by_dim:
+            entries.sort()
+
+    def _capacity_left(self, truck: Truck) -> List[float]:
+        """Return the capacity left in each dimension of <truck>.
+        """
+        left = [truck.available_space] + truck.available_limits
+        return left + [float('inf')] * (len(self._by_dim) - len(left))
+
+    def select(self, parcel: Parcel, largest: bool) -> int:
+        """Return the position of the truck that <parcel> should be packed
+        into, or -1 if it fits in no truck.
+
+        Trucks are chosen as in _TruckIndex.select, among only the trucks
+        that <parcel> fits in.
+
+        >>> trucks = [Truck(1, 10, 'Toronto', limits=(50,)),
+        ...           Truck(2, 20, 'Toronto', limits=(40, 3)),
+        ...           Truck(3, 20, 'Toronto')]
+        >>> index = _CapacityIndex(trucks)
+        >>> index.select(Parcel(1, 5, 'Toronto', 'Guelph', (45,)), True)
+        2
+        >>> index.select(Parcel(2, 5, 'Toronto', 'Guelph', (30, 4)), False)
+        0
+        >>> index.select(Parcel(3, 15, 'Toronto', 'Guelph', (10, 1)), False)
+        1
+        >>> index.select(Parcel(4, 25, 'Toronto', 'Guelph'), False)
+        -1
+        """
+        dims = len(self._by_dim)
+        sizes = [parcel.volume] + list(parcel.dimensions[:dims - 1])
+        # The dimension with the fewest trucks that have room for the parcel.
+        best_k, start = 0, bisect_left(self._by_dim[0], (sizes[0], -1))
+        for k in range(1, len(sizes)):
+            j = bisect_left(self._by_dim[k], (sizes[k], -1))
+            if j > start:
+                best_k, start = k, j
+        candidates = self._by_dim[best_k]
+        if start == len(candidates):
+            return -1
+
+        tail = self._by_tail.get(parcel.end)
+        if tail:
+            if len(tail) < len(candidates) - start:
+                found = self._choose(sorted(tail), sizes, largest)
+            else:
+                found = self._choose([i for _, i in candidates[start:]
+                                      if i in tail], sizes, largest)
+            if found != -1:
+                return found
+        if best_k == 0:
+            return self._choose_sorted(candidates, start, sizes, largest)
+        return self._choose([i for _, i in candidates[start:]], sizes,
+                            largest)
+
+    def _choose(self, positions: Iterable[int], sizes: List[int],
+                largest: bool, first: bool = False) -> int:
+        """Return the position in <positions> of the truck with the most
+        available space if <largest> is True, and the least otherwise, among
+        those with enough capacity left for <sizes> in every dimension.  Ties
+        are broken by position.  Return -1 if there is no such truck.
+
+        If <first> is True, return the first such truck in <positions>
+        instead.
+        """
+        best = -1
+        best_space = 0
+        for i in positions:
+            if not self._fits(i, sizes):
+                continue
+            if first:
+                return i
+            space = self._left[i][0]
+            if best == -1 or (space > best_space if largest
+                              else space < best_space) or \
+                    (space == best_space and i < best):
+                best, best_space = i, space
+        return best
+
+    def _choose_sorted(self, entries: List[Tuple[float, int]], start: int,
+                       sizes: List[int], largest: bool) -> int:
+        """Return the same truck as _choose for the positions in
+        entries[start:], where <entries> is sorted by available space.
+
+        Because <entries> is sorted, the search stops at the first truck with
+        enough capacity left, from the end of <entries> if <largest> is True
+        and from <start> otherwise.
+        """
+        if not largest:
+            return self._choose((i for _, i in entries[start:]), sizes, False,
+                                first=True)
+        best = -1
+        best_space = 0
+        for j in range(len(entries) - 1, start - 1, -1):
+            space, i = entries[j]
+            if best != -1 and space < best_space:
+                break
+            if self._fits(i, sizes):
+                best, best_space = i, space
+        return best
+
+    def _fits(self, i: int, sizes: List[int]) -> bool:
+        """Return whether the truck at position <i> has enough capacity
+        left for <sizes> in every dimension.
+        """
+        left = self._left[i]
+        for k, size in enumerate(sizes):
+            if size > left[k]:
+                return False
+        return True
 
-def _decdest_inc(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    def pack(self, i: int, parcel: Parcel) -> bool:
+        """Pack <parcel> into the truck at position <i>, update this index,
+        and return True.
 
-    parcel priority: non-increasing destination
-    truck priority: non-decreasing available space
-    """
-    not_scheduled = []
+        Precondition: <parcel> fits in the truck.
+        """
+        truck = self._trucks[i]
+        old_city = truck.route[-1]
+        old_left = self._left[i]
+        truck.pack(parcel)
+        new_left = self._capacity_left(truck)
+        self._left[i] = new_left
+
+        for k, entries in enumerate(self._by_dim):
+            if new_left[k] != old_left[k]:
+                del entries[bisect_left(entries, (old_left[k], i))]
+                insort(entries, (new_left[k], i))
+        if truck.route[-1] != old_city:
+            self._by_tail[old_city].discard(i)
+            self._by_tail.setdefault(truck.route[-1], set()).add(i)
+        return True
 
-    p = PriorityQueue(_comes_after)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_increasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
-            not_scheduled.append(box)
+# ----- Helper functions -----
 
-    return not_scheduled
 
+def _greedy_schedule(parcels: List[Parcel], trucks: List[Truck],
+                     parcel_key: Callable[[Parcel], Any], reverse: bool,
+                     largest: bool, stats: Optional[SchedulerStats] = None) \
+        -> List[Parcel]:
+    """A helper function for the GreedyScheduler class. Schedules <parcels>
+    onto <trucks> and returns the parcels that could not be scheduled.
 
-def _decdest_dec(parcels: List[Parcel], trucks: List[Truck]) -> List[Parcel]:
-    """A helper function for the GreedyScheduler class. Schedules parcels
-    onto trucks for a scheduler with:
+    Parcels are considered in order of <parcel_key>, from largest to smallest
+    if <reverse> is True.  Each parcel is packed into an eligible truck whose
+    route ends at the parcel's destination if there is one, choosing the
+    truck with the most available space if <largest> is True and the least
+    otherwise.  If there is no such truck, the same choice is made among all
+    eligible trucks.  A truck is eligible if the parcel fits in its available
+    space and in each of its available limits.
 
-    parcel priority: non-increasing destination
-    truck priority: non-increasing available space
+    If <stats> is given, counters and timings are recorded in it.
     """
     not_scheduled = []
-
-    p = PriorityQueue(_comes_after)
-
-    for parcel in parcels:
-        p.add(parcel)
-
-    while not p.is_empty():
-        box = p.remove()
-        eligible = []
-        eligible_2 = []
-        for truck in trucks:
-            if truck.available_space >= box.volume:
-                eligible.append(truck)
-        for e in eligible:
-            if e.route[-1] == box.end:
-                eligible_2.append(e)
-        if eligible_2 != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible_2:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        elif eligible != []:
-            pq = PriorityQueue(_decreasing_volume_truck)
-            for e in eligible:
-                pq.add(e)
-            chosen_truck = pq.remove()
-            chosen_truck.pack(box)
-        else:
+    start = perf_counter()
+    order = sorted(parcels, key=parcel_key, reverse=reverse)
+    sorted_at = perf_counter()
+    index = _TruckIndex(trucks)
+    indexed_at = perf_counter()
+    select = index.select
+
+    for box in order:
+        i = select(box.volume, box.end, largest)
+        if box.dimensions and i != -1 and not trucks[i].fits(box):
+            i = index.select_fitting(box, box.end, largest)
+        if stats is not None:
+            index.record(i, box, stats)
+        if i == -1 or not index.pack(i, box):
             not_scheduled.append(box)
 
+    if stats is not None:
+        stats.add_time('order', sorted_at - start)
+        stats.add_time('index', indexed_at - sorted_at)
+        stats.add_time('schedule', perf_counter() - indexed_at)
+        stats.finish()
     return not_scheduled
 
 
@@ -546,9 +1140,10 @@ if __name__ == '__main__':
 
     import python_ta
     python_ta.check_all(config={
-        'allowed-io': ['compare_algorithms'],
+        'allowed-io': ['compare_algorithms', 'GreedyScheduler.schedule'],
         'allowed-import-modules': ['doctest', 'python_ta', 'typing',
-                                   'random', 'container', 'domain'],
+                                   'random', 'operator', 'bisect', 'time',
+                                   'domain'],
         'disable': ['E1136'],
         'max-attributes': 15,
     })
@@ -0,0 +1,252 @@
+"""Assignment 1 - Scheduling service
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the SchedulingService class, an asyncio front end that
+accepts parcel assignment requests concurrently and schedules them in small
+batches with a GreedySession, as well as LocalClient, which submits requests
+to a service in the same process.
+
+All scheduling is done by a single task owned by the service, so trucks are
+never packed by two requests at once, and no lock is needed.
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from domain import Parcel
+from scheduler import GreedySession
+
+
+class SchedulingService:
+    """A service that assigns parcels to trucks as requests arrive, gathering
+    concurrent requests into batches.
+
+    A batch is scheduled as soon as it holds <max_batch> requests, or
+    <max_delay> seconds after its first request arrived, whichever comes
+    first.
+
+    === Public Attributes ===
+    max_batch: The largest number of requests scheduled together.
+    max_delay: The longest time, in seconds, that a request waits for other
+    requests to join its batch.
+
+    === Private Attributes ===
+    _session: The session that schedules parcels onto the trucks.
+    _requests: Parcels waiting to be scheduled, each with the future that
+    receives the ID of its truck, or None if it could not be scheduled.
+    _packed: Each parcel this service has packed, and the ID of its truck,
+    keyed by the id() of the parcel.  A parcel submitted again is not packed
+    again, but gets the same truck ID.
+    _worker: The task that schedules batches, or None if this service is not
+    running.
+
+    === Sample Usage ===
+    >>> from domain import Truck
+    >>> from scheduler import GreedyScheduler
+    >>> config = {'parcel_priority': 'volume',
+    ...           'parcel_order': 'non-increasing',
+    ...           'truck_order': 'non-decreasing'}
+    >>> session = GreedyScheduler(config).start([Truck(1, 10, 'Toronto')])
+    >>> async def demo():
+    ...     async with SchedulingService(session) as service:
+    ...         client = LocalClient(service)
+    ...         return await client.assign_many(
+    ...             [Parcel(1, 6, 'Toronto', 'Guelph'),
+    ...              Parcel(2, 6, 'Toronto', 'London')])
+    >>> asyncio.run(demo())
+    [1, None]
+
+    A parcel submitted more than once, in one batch or in several, is only
+    packed once:
+
+    >>> trucks = [Truck(1, 10, 'Toronto')]
+    >>> p = Parcel(1, 4, 'Toronto', 'Guelph')
+    >>> async def twice():
+    ...     async with SchedulingService(
+    ...             GreedyScheduler(config).start(trucks)) as service:
+    ...         client = LocalClient(service)
+    ...         first = await client.assign_many([p, p])
+    ...         return first, await client.assign(p)
+    >>> asyncio.run(twice())
+    ([1, 1], 1)
+    >>> trucks[0].packed_p, trucks[0].available_space
+    ([1], 6)
+    """
+    max_batch: int
+    max_delay: float
+    _session: GreedySession
+    _requests: 'asyncio.Queue[Tuple[Parcel, asyncio.Future]]'
+    _packed: Dict[int, Tuple[Parcel, int]]
+    _worker: Optional[asyncio.Task]
+
+    def __init__(self, session: GreedySession, max_batch: int = 256,
+                 max_delay: float = 0.001) -> None:
+        """Initialize this service, which schedules parcels with <session>
+        in batches of at most <max_batch> requests, waiting at most
+        <max_delay> seconds for a batch to fill.
+
+        Precondition: max_batch > 0 and max_delay >= 0
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._session = session
+        self._requests = asyncio.Queue()
+        self._packed = {}
+        self._worker = None
+
+    async def __aenter__(self) -> 'SchedulingService':
+        """Start this service.
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Stop this service.
+        """
+        await self.stop()
+
+    def start(self) -> None:
+        """Start scheduling submitted parcels.
+
+        Precondition: this service is not running, and an event loop is
+        running.
+        """
+        self._worker = asyncio.ensure_future(self._schedule_batches())
+
+    async def stop(self) -> None:
+        """Schedule every parcel submitted so far, then stop this service.
+        """
+        await self._requests.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(self, parcel: Parcel) -> Optional[int]:
+        """Schedule <parcel>, and return the ID of the truck it was packed
+        into, or None if it could not be scheduled.
+
+        Precondition: this service is running.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._requests.put_nowait((parcel, future))
+        return await future
+
+    async def _schedule_batches(self) -> None:
+        """Repeatedly gather a batch of requests and schedule it, until
+        cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._requests.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._requests.empty():
+                    batch.append(self._requests.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._requests.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._schedule(batch)
+
+    def _schedule(self, batch: List[Tuple[Parcel, asyncio.Future]]) -> None:
+        """Schedule the parcels in <batch> and resolve their futures.
+        """
+        # Each parcel is scheduled once, however many times it was submitted,
+        # and all of its requests get the same result.
+        futures = {}
+        parcels = []
+        for parcel, future in batch:
+            if id(parcel) in self._packed:
+                _resolve([future], self._packed[id(parcel)][1])
+            elif id(parcel) in futures:
+                futures[id(parcel)].append(future)
+            else:
+                futures[id(parcel)] = [future]
+                parcels.append(parcel)
+        try:
+            packed, left = self._session.assign_batch(parcels)
+        except Exception as error:  # report the failure to every request
+            for waiting in futures.values():
+                for future in waiting:
+                    if not future.done():
+                        future.set_exception(error)
+        else:
+            for parcel, truck in packed:
+                self._packed[id(parcel)] = (parcel, truck.truck_id)
+                _resolve(futures[id(parcel)], truck.truck_id)
+            for parcel in left:
+                _resolve(futures[id(parcel)], None)
+        for _ in batch:
+            self._requests.task_done()
+
+
+def _resolve(futures: List[asyncio.Future], result: Optional[int]) -> None:
+    """Set <result> as the result of each of <futures> that is not done.
+    """
+    for future in futures:
+        if not future.done():
+            future.set_result(result)
+
+
+class LocalClient:
+    """A client of a SchedulingService in the same process, for testing.
+
+    === Private Attributes ===
+    _service: The service that requests are submitted to.
+    """
+    _service: SchedulingService
+
+    def __init__(self, service: SchedulingService) -> None:
+        """Initialize this client of <service>.
+        """
+        self._service = service
+
+    async def assign(self, parcel: Parcel) -> Optional[int]:
+        """Request that <parcel> be scheduled, and return the ID of the truck
+        it was packed into, or None if it could not be scheduled.
+        """
+        return await self._service.submit(parcel)
+
+    async def assign_many(self, parcels: List[Parcel]) -> List[Optional[int]]:
+        """Request that each parcel in <parcels> be scheduled, concurrently,
+        and return the ID of the truck each was packed into, or None for
+        each that could not be scheduled, in the order of <parcels>.
+        """
+        return list(await asyncio.gather(
+            *(self._service.submit(parcel) for parcel in parcels)))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'asyncio', 'domain', 'scheduler'],
+        'disable': ['E1136', 'W0703'],
+        'max-attributes': 15,
+    })
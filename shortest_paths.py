@@ -0,0 +1,267 @@
+"""Assignment 1 - Shortest path distances
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module contains the class CompletedDistanceMap, a distance map that
+stores the length of the shortest path between every pair of cities, given
+only the distances of direct links between some of them.
+
+Road data usually lists only the links between neighbouring cities, so a
+plain DistanceMap returns -1 for most pairs of cities on a route.  A
+CompletedDistanceMap finds each shortest path once, with Dijkstra's algorithm
+from every city, and stores it in the same matrix a DistanceMap uses, so that
+looking up a distance still takes constant time.
+"""
+import heapq
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from distance_map import DistanceMap
+
+# The direct links out of each city, shared by the shortest path searches in
+# a worker process.  Set by _share_links.
+_shared_links: List[Dict[int, int]] = []
+
+
+def _dijkstra(links: List[Dict[int, int]], source: int) -> List[int]:
+    """Return the length of the shortest path from city <source> to each
+    city, where links[i][j] is the distance of the direct link from city i to
+    city j.  The length is -1 for each city that cannot be reached.
+
+    >>> _dijkstra([{1: 4, 2: 9}, {2: 3}, {}], 0)
+    [0, 4, 7]
+    >>> _dijkstra([{1: 4, 2: 9}, {2: 3}, {}], 2)
+    [-1, -1, 0]
+    """
+    dist = [-1] * len(links)
+    heap = [(0, source)]
+    while heap:
+        d, i = heapq.heappop(heap)
+        if dist[i] != -1:
+            continue
+        dist[i] = d
+        for j, link in links[i].items():
+            if dist[j] == -1:
+                heapq.heappush(heap, (d + link, j))
+    return dist
+
+
+def _share_links(links: List[Dict[int, int]]) -> None:
+    """Store the direct links used by the searches in this process.
+    """
+    _shared_links[:] = links
+
+
+def _shared_dijkstra(source: int) -> array:
+    """Return the result of _dijkstra from city <source> over the shared
+    links, as an array, which is much quicker to send between processes than
+    a list.
+    """
+    return array('i', _dijkstra(_shared_links, source))
+
+
+class CompletedDistanceMap(DistanceMap):
+    """A distance map that stores the shortest path distance between every
+    pair of cities connected by direct links.
+
+    add_distance records a direct link, and distance returns the length of
+    the shortest path made of direct links, which may be shorter than the
+    link between the same two cities.  The distance from a city to itself is
+    0, and the distance between two cities with no path between them is -1.
+
+    === Private Attributes ===
+    _links: The direct links out of each city, indexed by city id.
+    _links[i][j] is the distance of the link from city i to city j.
+
+    === Representation Invariants ===
+    - len(_links) == len(_cities)
+    - the distance stored from city i to city j is the length of the shortest
+      path from i to j in <_links>, or -1 if there is no such path.
+
+    === Sample Usage ===
+    >>> roads = DistanceMap()
+    >>> roads.add_distance('Toronto', 'Hamilton', 7)
+    >>> roads.add_distance('Hamilton', 'London', 9)
+    >>> roads.distance('Toronto', 'London')
+    -1
+    >>> dmap = CompletedDistanceMap(roads)
+    >>> dmap.distance('Toronto', 'London')
+    16
+    >>> dmap.add_distance('Toronto', 'London', 12)
+    >>> dmap.distance('London', 'Toronto'), dmap.distance('Hamilton', 'London')
+    (12, 9)
+    """
+    _links: List[Dict[int, int]]
+
+    def __init__(self, dmap: Optional[DistanceMap] = None,
+                 max_workers: Optional[int] = 1) -> None:
+        """Initialize this distance map with a direct link for each distance
+        stored in <dmap>, if it is given, and find every shortest path.
+
+        If <max_workers> is not 1, the shortest paths from different cities
+        are found in parallel in a pool of <max_workers> processes, or one
+        per CPU if it is None.
+        """
+        super().__init__()
+        self._links = []
+        if dmap is None:
+            return
+
+        n = dmap.num_cities()
+        for i in range(n):
+            self._add_city(dmap.city_name(i))
+        for i in range(n):
+            for j in range(n):
+                d = dmap.distance_by_id(i, j)
+                if d != -1 and i != j:
+                    self._links[i][j] = d
+        self._version = dmap.version()
+
+        if max_workers == 1:
+            rows = [_dijkstra(self._links, i) for i in range(n)]
+        else:
+            with ProcessPoolExecutor(max_workers, initializer=_share_links,
+                                     initargs=(self._links,)) as pool:
+                rows = list(pool.map(_shared_dijkstra, range(n),
+                                     chunksize=max(1, n // 64)))
+        for i, row in enumerate(rows):
+            self._set_row(i, row)
+
+    def _add_city(self, city: str) -> int:
+        """Return the id of <city>, adding it with no links if it is not yet
+        in this distance map.
+        """
+        n = len(self._cities)
+        i = super()._add_city(city)
+        if i == n:
+            self._links.append({})
+            self._matrix[i * self._stride + i] = 0
+        return i
+
+    def _set_row(self, i: int, row: Union[List[int], array]) -> None:
+        """Store <row> as the distances from the city with id <i>.
+        """
+        start = i * self._stride
+        if not isinstance(row, array):
+            row = array('i', row)
+        self._matrix[start:start + len(row)] = row
+
+    def add_distance(self, c1: str, c2: str, distance1: int,
+                     distance2: int = -1) -> None:
+        """Add a direct link between <c1> and <c2>, replacing any link
+        already between them, and update the shortest paths that it changes.
+
+        If distance2 is provided, distance1 is the distance of the link from
+        <c1> to <c2>, and distance2 is the distance of the link from <c2> to
+        <c1>.  Otherwise both links have distance1.
+
+        Precondition: distance1 and distance2 (if provided) are positive
+        integers.
+
+        >>> dmap = CompletedDistanceMap()
+        >>> dmap.add_distance('A', 'B', 2)
+        >>> dmap.add_distance('B', 'C', 2)
+        >>> dmap.add_distance('A', 'C', 3)
+        >>> dmap.distance('A', 'C')
+        3
+        >>> dmap.add_distance('A', 'C', 10)
+        >>> dmap.distance('A', 'C'), dmap.link_distance('A', 'C')
+        (4, 10)
+        """
+        i = self._add_city(c1)
+        j = self._add_city(c2)
+        self._version += 1
+        self._set_link(i, j, distance1)
+        self._set_link(j, i, distance1 if distance2 == -1 else distance2)
+
+    def link_distance(self, c1: str, c2: str) -> int:
+        """Return the distance of the direct link from <c1> to <c2>, or -1 if
+        there is no such link.
+
+        >>> dmap = CompletedDistanceMap()
+        >>> dmap.add_distance('A', 'B', 2)
+        >>> dmap.add_distance('B', 'C', 2)
+        >>> dmap.link_distance('A', 'B'), dmap.link_distance('A', 'C')
+        (2, -1)
+        """
+        i = self._city_ids.get(c1)
+        j = self._city_ids.get(c2)
+        if i is None or j is None:
+            return -1
+        return self._links[i].get(j, -1)
+
+    def _set_link(self, u: int, v: int, w: int) -> None:
+        """Set the direct link from city <u> to city <v> to have distance
+        <w>, and update the shortest paths that it changes.
+
+        A shorter link can only shorten paths that use it, so each distance
+        is compared with the path through the new link.  A longer link can
+        only lengthen the paths from cities whose shortest path to <v> used
+        it, so the paths from just those cities are found again.
+        """
+        old = self._links[u].get(v, -1)
+        self._links[u][v] = w
+        if u == v or w == old:
+            return
+
+        matrix = self._matrix
+        stride = self._stride
+        n = len(self._cities)
+        if old != -1 and w > old:
+            affected = [s for s in range(n)
+                        if matrix[s * stride + u] != -1 and
+                        matrix[s * stride + u] + old ==
+                        matrix[s * stride + v]]
+            for s in affected:
+                self._set_row(s, _dijkstra(self._links, s))
+            return
+
+        # Only sources that now reach <v> more quickly through the link, and
+        # targets that <u> now reaches more quickly through it, can improve.
+        sources = []
+        for s in range(n):
+            to_u = matrix[s * stride + u]
+            to_v = matrix[s * stride + v]
+            if to_u != -1 and (to_v == -1 or to_u + w < to_v):
+                sources.append((s * stride, to_u + w))
+        targets = []
+        for t in range(n):
+            from_v = matrix[v * stride + t]
+            from_u = matrix[u * stride + t]
+            if from_v != -1 and (from_u == -1 or w + from_v < from_u):
+                targets.append((t, from_v))
+
+        for row, to_v in sources:
+            for t, from_v in targets:
+                current = matrix[row + t]
+                if current == -1 or to_v + from_v < current:
+                    matrix[row + t] = to_v + from_v
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': ['doctest', 'python_ta', 'typing',
+                                   'heapq', 'array', 'concurrent.futures',
+                                   'distance_map'],
+        'disable': ['E1136'],
+        'max-attributes': 15,
+    })
+    import doctest
+    doctest.testmod()
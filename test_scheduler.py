@@ -0,0 +1,171 @@
+"""Assignment 1 - Tests for the scheduling algorithms (Task 4)
+
+CSC148, Winter 2021
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) 2021 Diane Horton, Ian Berlott-Atwell, Jonathan Calver,
+Sophia Huynh, Maryam Majedi, and Jaisie Sin.
+
+===== Module Description =====
+
+This module checks that GreedyScheduler, which orders parcels by key and
+keeps its trucks in sorted indexes, schedules exactly as the original
+greedy algorithm did.  The original algorithm scanned every truck for every
+parcel and ordered parcels and trucks with comparator-based PriorityQueues;
+it is kept here, unchanged, as the reference.
+"""
+from random import Random
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+from container import PriorityQueue
+from domain import Parcel, Truck
+from scheduler import GREEDY_CONFIGS, GreedyScheduler
+
+
+def _decreasing_volume_parcel(a: Parcel, b: Parcel) -> bool:
+    """
+    Return True if <a> has more volume than <b>.
+    """
+    return a.volume > b.volume
+
+
+def _increasing_volume_parcel(a: Parcel, b: Parcel) -> bool:
+    """
+    Return True if <b> has more volume than <a>.
+    """
+    return a.volume < b.volume
+
+
+def _decreasing_volume_truck(a: Truck, b: Truck) -> bool:
+    """
+    Return True if <a> has more available space than <b>.
+    """
+    return a.available_space > b.available_space
+
+
+def _increasing_volume_truck(a: Truck, b: Truck) -> bool:
+    """
+    Return True if <b> has more available space than <a>.
+    """
+    return a.available_space < b.available_space
+
+
+def _comes_before(a: Parcel, b: Parcel) -> bool:
+    """
+    Return True if <a>'s destination comes before <b> alphabetically.
+    """
+    return a.end < b.end
+
+
+def _comes_after(a: Parcel, b: Parcel) -> bool:
+    """
+    Return True if <a>'s destination comes after <b> alphabetically.
+    """
+    return a.end > b.end
+
+
+# The comparators the original GreedyScheduler used for each parcel priority
+# and parcel order, and for each truck order.
+_PARCEL_COMPARATORS: Dict[Tuple[str, str], Callable[[Parcel, Parcel], bool]] \
+    = {('volume', 'non-decreasing'): _increasing_volume_parcel,
+       ('volume', 'non-increasing'): _decreasing_volume_parcel,
+       ('destination', 'non-decreasing'): _comes_before,
+       ('destination', 'non-increasing'): _comes_after}
+_TRUCK_COMPARATORS: Dict[str, Callable[[Truck, Truck], bool]] = {
+    'non-decreasing': _increasing_volume_truck,
+    'non-increasing': _decreasing_volume_truck}
+
+
+def _original_schedule(config: Dict[str, str], parcels: List[Parcel],
+                       trucks: List[Truck]) -> List[Parcel]:
+    """Schedule <parcels> onto <trucks> with the original greedy algorithm
+    for <config>, and return the parcels that could not be scheduled.
+
+    The loop is the one each of the original per-configuration helpers
+    (_inc_inc, _inc_dec, ..., _decdest_dec) ran, with that helper's
+    comparators looked up from <config>.
+    """
+    parcel_priority = _PARCEL_COMPARATORS[(config['parcel_priority'],
+                                           config['parcel_order'])]
+    truck_priority = _TRUCK_COMPARATORS[config['truck_order']]
+
+    not_scheduled = []
+
+    p = PriorityQueue(parcel_priority)
+
+    for parcel in parcels:
+        p.add(parcel)
+
+    while not p.is_empty():
+        box = p.remove()
+        eligible = []
+        eligible_2 = []
+        for truck in trucks:
+            if truck.available_space >= box.volume:
+                eligible.append(truck)
+        for e in eligible:
+            if e.route[-1] == box.end:
+                eligible_2.append(e)
+        if eligible_2 != []:
+            pq = PriorityQueue(truck_priority)
+            for e in eligible_2:
+                pq.add(e)
+            chosen_truck = pq.remove()
+            chosen_truck.pack(box)
+        elif eligible != []:
+            pq = PriorityQueue(truck_priority)
+            for e in eligible:
+                pq.add(e)
+            chosen_truck = pq.remove()
+            chosen_truck.pack(box)
+        else:
+            not_scheduled.append(box)
+
+    return not_scheduled
+
+
+def _random_workload(rng: Random) -> Tuple[List[Parcel], List[int]]:
+    """Return random parcels from a single depot, and the capacities of the
+    trucks to schedule them onto.
+
+    Volumes, capacities and destinations are drawn from small ranges so that
+    ties in every ordering are common.
+    """
+    cities = ['Toronto', 'Hamilton', 'London', 'Guelph', 'Ottawa']
+    parcels = [Parcel(i, rng.randint(1, 12), 'Toronto', rng.choice(cities))
+               for i in range(rng.randint(0, 40))]
+    capacities = [rng.randint(5, 40) for _ in range(rng.randint(0, 8))]
+    return parcels, capacities
+
+
+@pytest.mark.parametrize('config', GREEDY_CONFIGS)
+def test_greedy_matches_original(config: Dict[str, str]) -> None:
+    """GreedyScheduler leaves the same parcels unscheduled, and packs and
+    routes every truck the same way, as the original greedy algorithm.
+    """
+    rng = Random(0)
+    for _ in range(300):
+        parcels, capacities = _random_workload(rng)
+        expected = [Truck(i, c, 'Toronto') for i, c in enumerate(capacities)]
+        actual = [Truck(i, c, 'Toronto') for i, c in enumerate(capacities)]
+
+        left = _original_schedule(config, parcels, expected)
+        assert GreedyScheduler(config).schedule(parcels, actual) == left
+        for t1, t2 in zip(expected, actual):
+            assert t1.packed_p == t2.packed_p
+            assert t1.route == t2.route
+
+
+if __name__ == '__main__':
+    pytest.main(['test_scheduler.py'])